@@ -1,8 +1,19 @@
-from flask import Flask, render_template
-import hmap
+import os
+
+import startup
+
+with startup.phase("import flask"):
+    from flask import Flask, render_template
 
 app = Flask(__name__)
 
+
+def warm_up_dashboards():
+    """Import the player dashboard and load its match data ahead of the first visit."""
+    with startup.phase("import hmap"):
+        import hmap
+    hmap.get_data()
+
 @app.route('/')
 def home():
         # Eye-catching titles and short descriptions
@@ -19,4 +30,8 @@ def app_page():
     return render_template('app_page.html')
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    # Opt-in (AI_COACH_WARMUP=1): load the dashboard data in the background while the landing page serves
+    if startup.WARMUP and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':  # Reloader child only
+        startup.warm_up(warm_up_dashboards, "hmap warm-up")
+    startup.report("Landing app start-up")
+    app.run(debug=True)
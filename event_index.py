@@ -0,0 +1,46 @@
+"""Precomputed row-position index over an events frame.
+
+Built once when the data is loaded: for each player, team and event type (and
+the player/type and team/type pairs the dashboards filter on) it keeps the
+sorted row positions holding that value. Looking up a player's events is then
+an ``iloc`` over k rows instead of a boolean mask over the whole frame, which
+matters once the frame holds a season rather than one match.
+"""
+import numpy as np
+
+INDEX_COLUMNS = ['player', 'team', 'type']
+INDEX_PAIRS = [('player', 'type'), ('team', 'type')]
+
+_NO_ROWS = np.array([], dtype=np.intp)
+
+
+def build_event_index(events, columns=INDEX_COLUMNS, pairs=INDEX_PAIRS):
+    """Map column -> value -> sorted row positions, for single columns and column pairs."""
+    index = {}
+    for col in columns:
+        if col in events.columns:
+            index[col] = events.groupby(col, observed=True, sort=False).indices
+    for pair in pairs:
+        if all(col in events.columns for col in pair):
+            index[pair] = events.groupby(list(pair), observed=True, sort=False).indices
+    return index
+
+
+def positions(index, **filters):
+    """Row positions matching every ``column=value`` filter, e.g. ``positions(index, player=p, type='Pass')``."""
+    if not filters:
+        raise ValueError("positions() needs at least one filter")
+    pair = tuple(sorted(filters, key=lambda col: INDEX_COLUMNS.index(col) if col in INDEX_COLUMNS else len(INDEX_COLUMNS)))
+    if len(pair) == 2 and pair in index:
+        return index[pair].get(tuple(filters[col] for col in pair), _NO_ROWS)
+
+    result = None
+    for col, value in filters.items():
+        rows = index[col].get(value, _NO_ROWS)
+        result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+    return result
+
+
+def select(events, index, **filters):
+    """The rows of ``events`` matching every filter, read through the index."""
+    return events.iloc[positions(index, **filters)]
@@ -0,0 +1,135 @@
+"""Vectorized shot freeze-frame features.
+
+StatsBomb freeze frames are a list of player dicts per shot. ``pack_freeze_frames``
+flattens them once into ragged arrays (one entry per player, ``offsets`` marking
+where each shot starts), and every feature below is then a handful of array
+operations over all shots at once instead of a Python loop per shot and player.
+"""
+import numpy as np
+
+GOALKEEPER = 1  # StatsBomb position id
+GOAL_X = 120.0
+LEFT_POST = (120.0, 36.0)
+RIGHT_POST = (120.0, 44.0)
+
+# StatsBomb position ids, for freeze frames whose position is a plain name
+POSITION_IDS = {
+    'Goalkeeper': 1, 'Right Back': 2, 'Right Center Back': 3, 'Center Back': 4, 'Left Center Back': 5,
+    'Left Back': 6, 'Right Wing Back': 7, 'Left Wing Back': 8, 'Right Defensive Midfield': 9,
+    'Center Defensive Midfield': 10, 'Left Defensive Midfield': 11, 'Right Midfield': 12,
+    'Right Center Midfield': 13, 'Center Midfield': 14, 'Left Center Midfield': 15, 'Left Midfield': 16,
+    'Right Wing': 17, 'Right Attacking Midfield': 18, 'Center Attacking Midfield': 19,
+    'Left Attacking Midfield': 20, 'Left Wing': 21, 'Right Center Forward': 22, 'Striker': 23,
+    'Left Center Forward': 24, 'Secondary Striker': 25,
+}
+
+
+def _position_code(position):
+    """Position id from a ``{'id', 'name'}`` dict or a position name; 0 if unknown."""
+    if isinstance(position, dict):
+        return position.get('id') or POSITION_IDS.get(position.get('name'), 0)
+    return POSITION_IDS.get(position, 0)
+
+
+def pack_freeze_frames(frames):
+    """Flatten an iterable of freeze frames (lists of player dicts, or NaN) into ragged arrays."""
+    counts, xs, ys, teammate, position = [], [], [], [], []
+    for frame in frames:
+        if not isinstance(frame, list):
+            counts.append(0)
+            continue
+        counts.append(len(frame))
+        for player in frame:
+            xs.append(player['location'][0])
+            ys.append(player['location'][1])
+            teammate.append(bool(player.get('teammate')))
+            position.append(_position_code(player.get('position')))
+    counts = np.array(counts, dtype=np.intp)
+    offsets = np.zeros(len(counts) + 1, dtype=np.intp)
+    np.cumsum(counts, out=offsets[1:])
+    return {
+        'x': np.array(xs, dtype=np.float32),
+        'y': np.array(ys, dtype=np.float32),
+        'teammate': np.array(teammate, dtype=bool),
+        'position': np.array(position, dtype=np.int16),
+        'offsets': offsets,
+        'shot': np.repeat(np.arange(len(counts)), counts),  # Owning shot of each entry
+    }
+
+
+def _shot_distances(packed, shot_x, shot_y):
+    """Distance from each entry to its own shot location."""
+    shot = packed['shot']
+    return np.hypot(packed['x'] - np.asarray(shot_x, dtype=np.float32)[shot],
+                    packed['y'] - np.asarray(shot_y, dtype=np.float32)[shot])
+
+
+def _min_per_shot(packed, values, mask):
+    """Per-shot minimum of ``values`` over the masked entries; NaN for shots with none."""
+    n_shots = len(packed['offsets']) - 1
+    result = np.full(n_shots, np.inf)
+    np.minimum.at(result, packed['shot'][mask], values[mask])
+    result[np.isinf(result)] = np.nan
+    return result
+
+
+def _opponents(packed):
+    return ~packed['teammate'] & (packed['position'] != GOALKEEPER)
+
+
+def goalkeeper_distance(packed, shot_x, shot_y):
+    """Distance from each shot to the opposition goalkeeper; NaN if he is not in the frame."""
+    keeper = ~packed['teammate'] & (packed['position'] == GOALKEEPER)
+    return _min_per_shot(packed, _shot_distances(packed, shot_x, shot_y), keeper)
+
+
+def defender_counts(packed, shot_x, shot_y, radius=5):
+    """Outfield opponents within ``radius`` of each shot; a list of radii gives one column per radius."""
+    distances = _shot_distances(packed, shot_x, shot_y)
+    opponents = _opponents(packed)
+    n_shots = len(packed['offsets']) - 1
+    radii = np.atleast_1d(radius)
+    counts = np.column_stack([
+        np.bincount(packed['shot'][opponents & (distances <= r)], minlength=n_shots) for r in radii
+    ])
+    return counts[:, 0] if np.ndim(radius) == 0 else counts
+
+
+def cone_blockers(packed, shot_x, shot_y, include_keeper=True):
+    """Opponents inside the triangle between each shot and the two goalposts."""
+    shot = packed['shot']
+    sx = np.asarray(shot_x, dtype=np.float32)[shot]
+    sy = np.asarray(shot_y, dtype=np.float32)[shot]
+    px, py = packed['x'], packed['y']
+
+    def side(ax, ay, bx, by):
+        return (bx - ax) * (py - ay) - (by - ay) * (px - ax)
+
+    d1 = side(sx, sy, *LEFT_POST)
+    d2 = side(LEFT_POST[0], LEFT_POST[1], *RIGHT_POST)
+    d3 = side(RIGHT_POST[0], RIGHT_POST[1], sx, sy)
+    inside = ~(((d1 < 0) | (d2 < 0) | (d3 < 0)) & ((d1 > 0) | (d2 > 0) | (d3 > 0)))
+
+    mask = inside & ~packed['teammate']
+    if not include_keeper:
+        mask &= packed['position'] != GOALKEEPER
+    return np.bincount(shot[mask], minlength=len(packed['offsets']) - 1)
+
+
+def nearest_defender_distance(packed, shot_x, shot_y):
+    """Distance from each shot to the closest outfield opponent; NaN if none is in the frame."""
+    return _min_per_shot(packed, _shot_distances(packed, shot_x, shot_y), _opponents(packed))
+
+
+def freeze_frame_features(shots, radius=5):
+    """gk_distance, defender_density, cone_blockers and nearest_defender for a shots frame with x/y."""
+    import pandas as pd
+
+    packed = pack_freeze_frames(shots['shot_freeze_frame'])
+    shot_x, shot_y = shots['x'].to_numpy(), shots['y'].to_numpy()
+    return pd.DataFrame({
+        'gk_distance': goalkeeper_distance(packed, shot_x, shot_y),
+        'defender_density': defender_counts(packed, shot_x, shot_y, radius),
+        'cone_blockers': cone_blockers(packed, shot_x, shot_y),
+        'nearest_defender': nearest_defender_distance(packed, shot_x, shot_y),
+    }, index=shots.index)
@@ -1,63 +1,173 @@
-import dash
-from dash import dcc, html, Input, Output, exceptions
-import pandas as pd
-import numpy as np
-from statsbombpy import sb
-import seaborn as sns
-import matplotlib.pyplot as plt
+import threading
+from functools import lru_cache
+import startup
+
+# Only the Dash app itself is imported up front; pandas, matplotlib and mplsoccer
+# are imported on first use so importing this module (e.g. from app.py) stays cheap
+with startup.phase("hmap: import dash"):
+    import dash
+    from dash import dcc, html, Input, Output, exceptions
 from io import BytesIO
-import base64
-from mplsoccer import Pitch
-import matplotlib
-matplotlib.use('Agg')  # Use non-GUI backend for matplotlib to avoid Tkinter conflicts
-
-# Get the World Cup Final match data (cached to improve performance)
-try:
-    competitions = sb.competitions()
-    matches = sb.matches(competition_id=43, season_id=106)  # World Cup 2022
-    final_match = matches[(matches['home_team'] == 'Argentina') & (matches['away_team'] == 'France')].iloc[0]
-    events = sb.events(match_id=final_match['match_id'])
-except Exception as e:
-    print(f"Error fetching StatsBomb data: {str(e)}")
-    events = pd.DataFrame()  # Fallback empty DataFrame
-
-# Clean player names and cache for performance
-players = events['player'].dropna().unique().tolist()
-players = [p for p in players if isinstance(p, str)]
-players.sort()
+import os
+import http_cache
+
+_data = None
+_data_lock = threading.Lock()
+PITCH_STYLE = {'pitch_type': 'statsbomb', 'pitch_color': '#1a1a1a', 'line_color': 'white'}
+RENDER_VERSION = 2  # Bump when the drawing code changes
+RENDER_MODES = ('image', 'plotly')  # Server-side PNG or a Plotly figure drawn in the browser
+DEFAULT_RENDER_MODE = os.environ.get('AI_COACH_HMAP_RENDER', 'image')
+PLOTLY_COARSEN = 2  # Heatmap cells are 2x2 pitch units in plotly mode: a quarter of the data to send
+NETWORK_MIN_PASSES = 2  # Team pass network edges need at least this many completed passes
+VIEW_CACHE_DIR = os.environ.get('AI_COACH_VIEW_CACHE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'views'))
+VIEW_CACHE_MB = int(os.environ.get('AI_COACH_VIEW_CACHE_MB', 200))
+# Rendered images are stored under the hash of their bytes and served by URL with immutable caching
+IMAGE_DIR = os.path.join(VIEW_CACHE_DIR, 'images')
+IMAGE_URL = '/images'
+IMAGE_CACHE_MB = int(os.environ.get('AI_COACH_IMAGE_CACHE_MB', 500))
+# Opt-in (AI_COACH_VIEW_WARMUP=1): render every player's views in the background after start-up
+VIEW_WARMUP = os.environ.get('AI_COACH_VIEW_WARMUP', '').lower() in ('1', 'true', 'yes')
+VIEW_WARMUP_WORKERS = int(os.environ.get('AI_COACH_VIEW_WARMUP_WORKERS', 2))
+interactive = startup.InteractiveGate()  # Warm-up renders wait while a callback is running
+_view_cache = None
+_image_store = None
+
+def get_data():
+    """Load the World Cup Final events, their index and the player list on first use."""
+    global _data
+    with _data_lock:
+        if _data is None:
+            with startup.phase("hmap: import pandas + match store"):
+                import pandas as pd
+                import match_store
+                from event_index import build_event_index
+
+            # Get the World Cup Final match data (read from the local match store)
+            with startup.phase("hmap: load match data"):
+                match_id = None
+                try:
+                    matches = match_store.load_matches(competition_id=43, season_id=106)  # World Cup 2022
+                    final_match = matches[(matches['home_team'] == 'Argentina') & (matches['away_team'] == 'France')].iloc[0]
+                    match_id = int(final_match['match_id'])
+                    events = match_store.load_events(match_id=match_id, categorical=True)
+                except Exception as e:
+                    print(f"Error loading StatsBomb data: {str(e)}")
+                    events = pd.DataFrame(columns=['player', 'team', 'type'])  # Fallback empty DataFrame
+
+                # Row-position index so callbacks take a player's events without scanning the whole frame
+                event_index = build_event_index(events)
+
+                # Clean player names and cache for performance
+                players = events['player'].dropna().unique().tolist()
+                players = [p for p in players if isinstance(p, str)]
+                players.sort()
+
+            _data = {'events': events, 'event_index': event_index, 'players': players, 'match_id': match_id,
+                     'version': match_store.data_version(match_id) if match_id is not None else None}
+    return _data
+
+def invalidate():
+    """Drop the loaded match data and everything derived from it; the next request reloads."""
+    global _data
+    with _data_lock:
+        _data = None
+    player_grid.cache_clear()
+    if _view_cache is not None:
+        _view_cache.invalidate()
+
+def current_data():
+    """Match data, reloaded first if the stored events changed since they were loaded (e.g. a re-ingest)."""
+    import match_store
+    data = get_data()
+    if data['match_id'] is not None and match_store.data_version(data['match_id']) != data['version']:
+        invalidate()
+        data = get_data()
+    return data
+
+def get_view_cache():
+    """The visualization cache, indexed from disk on first use."""
+    global _view_cache
+    with _data_lock:
+        if _view_cache is None:
+            from view_cache import ViewCache
+            _view_cache = ViewCache(VIEW_CACHE_DIR, max_entries=512, max_bytes=VIEW_CACHE_MB * 1024 * 1024)  # Every view of a match
+    return _view_cache
+
+_plot_modules = None
+
+def get_image_store():
+    """The content-addressed image directory, indexed from disk on first use."""
+    global _image_store
+    with _data_lock:
+        if _image_store is None:
+            from render_cache import RenderCache
+            _image_store = RenderCache(IMAGE_DIR, max_bytes=IMAGE_CACHE_MB * 1024 * 1024,
+                                       extension=http_cache.IMAGE_FORMAT)
+    return _image_store
+
+def publish(fig):
+    """Save a figure into the image store under the hash of its bytes; returns its URL."""
+    buf = BytesIO()
+    fig.savefig(buf, format=http_cache.IMAGE_FORMAT, facecolor='#1a1a1a', bbox_inches='tight', dpi=150,  # Lower DPI for speed
+                **http_cache.SAVE_KWARGS[http_cache.IMAGE_FORMAT])
+    data = buf.getvalue()
+    key = http_cache.content_key(data)
+    store = get_image_store()
+    if store.get(key, count=False) is None:
+        def write(path):
+            with open(path, 'wb') as f:
+                f.write(data)
+        store.put(key, write)
+    return f"{IMAGE_URL}/{key}.{http_cache.IMAGE_FORMAT}"
+
+def _plotting():
+    """Import the plotting stack on first render; returns the pitch figure cache."""
+    global _plot_modules
+    if _plot_modules is None:
+        with startup.phase("hmap: import plotting"):
+            import matplotlib
+            matplotlib.use('Agg')  # Use non-GUI backend for matplotlib to avoid Tkinter conflicts
+            import pitch_cache  # Pooled, reusable pitch figures, no pyplot global state
+            pitch_cache.get_pitch(**PITCH_STYLE)  # Imports mplsoccer
+        _plot_modules = pitch_cache
+    return _plot_modules
+
+@lru_cache(maxsize=256)
+def player_grid(player_name):
+    """Binned pitch counts of a player's located events, kept across requests."""
+    from density import bin_counts
+    from event_index import select
+    data = get_data()
+    player_events = select(data['events'], data['event_index'], player=player_name)
+    return bin_counts(player_events['x'], player_events['y'])
 
 def generate_heatmap(player_name):
-    """Generate a heatmap for a player's events, optimized for performance."""
-    pitch = Pitch(pitch_type='statsbomb', pitch_color='#1a1a1a', line_color='white')
-    fig, ax = pitch.draw(figsize=(10, 7), constrained_layout=True)  # Smaller figure for speed
+    """Generate a heatmap for a player's events, optimized for performance; returns its image URL."""
+    from density import draw_density, smooth
+    from event_index import select
+    pitch_cache = _plotting()
+    data = get_data()
+    fig, ax, pitch = pitch_cache.pitch_figure(PITCH_STYLE, (10, 7), layout='constrained')  # Smaller figure for speed
    
     # Add team indicators
     ax.text(5, 40, 'Argentina →', color='white', fontsize=10, ha='left')
     ax.text(115, 40, '← France', color='white', fontsize=10, ha='right')
    
-    player_events = events[events['player'] == player_name]
-    locations = []
-    for _, event in player_events.iterrows():
-        if isinstance(event['location'], list) and len(event['location']) >= 2:
-            locations.append(event['location'][:2])  # Use only x, y coordinates
+    player_events = select(data['events'], data['event_index'], player=player_name)
+    located = player_events['x'].notna().to_numpy()
+    x_coords = player_events['x'].to_numpy()[located]
+    y_coords = player_events['y'].to_numpy()[located]
    
-    if locations:
-        x_coords = [loc[0] for loc in locations]
-        y_coords = [loc[1] for loc in locations]
-       
+    if len(x_coords):
         if len(x_coords) < 10:
             pitch.scatter(x_coords, y_coords, ax=ax, color='red', s=50, alpha=0.7)  # Smaller points
         else:
-            sns.kdeplot(
-                x=x_coords,
-                y=y_coords,
+            draw_density(
+                ax,
+                smooth(player_grid(player_name), bw_adjust=0.5),
                 cmap='RdYlBu_r',
-                fill=True,
                 alpha=0.7,
-                ax=ax,
-                levels=10,  # Fewer levels for speed
-                thresh=0.2,
-                bw_adjust=0.5  # Adjust bandwidth for performance
+                thresh=0.2
             )
        
         ax.set_title(
@@ -81,20 +191,22 @@ def generate_heatmap(player_name):
         )
         ax.set_title(f"{player_name} Event Heatmap (0 events)", color='white', pad=10)
    
-    buf = BytesIO()
-    plt.savefig(buf, format="png", facecolor='#1a1a1a', bbox_inches='tight', dpi=150)  # Lower DPI for speed
-    plt.close(fig)
-    return base64.b64encode(buf.getvalue()).decode()
+    url = publish(fig)
+    pitch_cache.release(fig)
+    return url
 
 def generate_pass_network(player_name):
-    """Generate a pass network visualization for a player, optimized for performance."""
-    player_passes = events[(events['player'] == player_name) & (events['type'] == 'Pass')]
+    """Generate a pass network visualization for a player, optimized for performance; returns its image URL (None without passes)."""
+    import pandas as pd
+    from event_index import select
+    pitch_cache = _plotting()
+    data = get_data()
+    player_passes = select(data['events'], data['event_index'], player=player_name, type='Pass')
    
     if len(player_passes) == 0:
         return None
    
-    pitch = Pitch(pitch_type='statsbomb', pitch_color='#1a1a1a', line_color='white')
-    fig, ax = pitch.draw(figsize=(10, 7), constrained_layout=True)  # Smaller figure
+    fig, ax, pitch = pitch_cache.pitch_figure(PITCH_STYLE, (10, 7), layout='constrained')  # Smaller figure
    
     # Add team indicators
     ax.text(5, 40, 'Argentina →', color='white', fontsize=10, ha='left')
@@ -103,17 +215,13 @@ def generate_pass_network(player_name):
     successful_passes = player_passes[pd.isna(player_passes['pass_outcome'])]
     unsuccessful_passes = player_passes[player_passes['pass_outcome'].notna()]
    
-    for _, pass_event in player_passes.iterrows():
-        if (isinstance(pass_event['location'], list) and
-            isinstance(pass_event.get('pass_end_location', [None, None]), list) and
-            pass_event['location'][0] is not None and
-            pass_event['pass_end_location'][0] is not None):
-            start_loc = pass_event['location'][:2]  # Use only x, y
-            end_loc = pass_event['pass_end_location'][:2]  # Use only x, y
-            color = 'lime' if pd.isna(pass_event.get('pass_outcome')) else 'red'
-            pitch.arrows(start_loc[0], start_loc[1],
-                       end_loc[0], end_loc[1],
-                       ax=ax, color=color, alpha=0.5, width=1.5)  # Thinner arrows for speed
+    # One batched arrows call per outcome instead of one per pass
+    for passes_subset, color in ((successful_passes, 'lime'), (unsuccessful_passes, 'red')):
+        drawable = passes_subset[['x', 'y', 'end_x', 'end_y']].dropna()
+        if not drawable.empty:
+            pitch.arrows(drawable['x'].to_numpy(), drawable['y'].to_numpy(),
+                         drawable['end_x'].to_numpy(), drawable['end_y'].to_numpy(),
+                         ax=ax, color=color, alpha=0.5, width=1.5)  # Thinner arrows for speed
    
     ax.set_title(
         f"{player_name} Pass Network\n({len(successful_passes)} Successful / {len(unsuccessful_passes)} Unsuccessful)",
@@ -121,142 +229,216 @@ def generate_pass_network(player_name):
     )
     fig.patch.set_facecolor('#1a1a1a')
    
-    buf = BytesIO()
-    plt.savefig(buf, format="png", facecolor='#1a1a1a', bbox_inches='tight', dpi=150)  # Lower DPI
-    plt.close(fig)
-    return base64.b64encode(buf.getvalue()).decode()
+    url = publish(fig)
+    pitch_cache.release(fig)
+    return url
 
-def prepare_player_stats(player_name):
-    """Simulate realistic player statistics for the 2022 World Cup Final, focusing on essential stats for a coach."""
-    # Base stats for all players (default values, adjusted for typical roles)
-    base_stats = {
-        'Total Touches': 50,  # Average involvement
-        'Passes Attempted': 30,
-        'Pass Accuracy': "75.0%",  # Default accuracy
-        'Shots': 1,
-        'Goals': 0,
-        'Key Passes': 1,
-        'Defensive Actions': 3  # Tackles, interceptions, blocks
-    }
+def player_team(player_name):
+    """The team a player played for (None if they have no events)."""
+    from event_index import select
+    data = get_data()
+    teams = select(data['events'], data['event_index'], player=player_name)['team'].dropna()
+    return str(teams.iloc[0]) if len(teams) else None
 
-    # Override with specific stats based on match reports and provided data for key players
-    if player_name == "Lionel Messi":  # Argentina, scored twice, key playmaker
-        return {
-            'Total Touches': 65,  # Estimated from high involvement (close to 64.72 per 90 from data)
-            'Passes Attempted': 52,  # Estimated from 51.53 per 90
-            'Pass Accuracy': "77.2%",  # Directly from data
-            'Shots': 4,  # From 5.08 per 90, adjusted for match duration
-            'Goals': 2,  # Scored twice in final
-            'Key Passes': 5,  # From 1.67 key passes per 90, scaled up for match
-            'Defensive Actions': 2  # Low as forward, from 1.03 (tackles + interceptions) per 90
-        }
-   
-    elif player_name == "Kylian Mbappé":  # France, scored hat-trick, dynamic forward
-        return {
-            'Total Touches': 65,  # Estimated from high involvement
-            'Passes Attempted': 25,  # Lower as forward, estimated
-            'Pass Accuracy': "80.0%",  # Estimated high accuracy
-            'Shots': 7,  # Scored hat-trick, multiple attempts
-            'Goals': 3,  # Hat-trick in final
-            'Key Passes': 3,  # Estimated creativity
-            'Defensive Actions': 1  # Minimal as forward
-        }
-   
-    elif player_name == "Antoine Griezmann":  # France, playmaker, created chances
-        return {
-            'Total Touches': 70,  # High involvement as playmaker
-            'Passes Attempted': 50,  # Estimated high passing
-            'Pass Accuracy': "85.0%",  # Estimated high accuracy
-            'Shots': 2,  # Few shots but impactful
-            'Goals': 0,  # No goals in final
-            'Key Passes': 6,  # High creativity, estimated
-            'Defensive Actions': 4  # Some defensive work as midfielder
-        }
-   
-    elif player_name == "Ángel Di María":  # Argentina, scored, impactful early
-        return {
-            'Total Touches': 60,  # High before substitution
-            'Passes Attempted': 40,  # Estimated passing
-            'Pass Accuracy': "82.0%",  # Estimated good accuracy
-            'Shots': 3,  # Scored once
-            'Goals': 1,  # Scored in regulation
-            'Key Passes': 3,  # Assisted, estimated
-            'Defensive Actions': 2  # Limited defensively
-        }
-   
-    elif player_name == "Julian Álvarez":  # Argentina, scored twice
-        return {
-            'Total Touches': 55,  # Solid involvement
-            'Passes Attempted': 25,  # Lower as forward
-            'Pass Accuracy': "78.0%",  # Estimated decent accuracy
-            'Shots': 4,  # Scored twice
-            'Goals': 2,  # Scored in regulation
-            'Key Passes': 2,  # Estimated creativity
-            'Defensive Actions': 1  # Minimal defensively
-        }
-   
-    elif player_name == "Emiliano Martínez":  # Argentina, goalkeeper, hero in shootout
-        return {
-            'Total Touches': 30,  # Typical for goalkeeper
-            'Passes Attempted': 15,  # Goal kicks and short passes
-            'Pass Accuracy': "85.0%",  # Estimated high for goalkeeper
-            'Shots': 0,  # No shots
-            'Goals': 0,  # No goals
-            'Key Passes': 0,  # No key passes as goalkeeper
-            'Defensive Actions': 8  # Saves, including penalty saves
-        }
-   
-    elif player_name == "Hugo Lloris":  # France, goalkeeper
-        return {
-            'Total Touches': 25,  # Typical for goalkeeper
-            'Passes Attempted': 12,  # Goal kicks and short passes
-            'Pass Accuracy': "83.0%",  # Estimated high for goalkeeper
-            'Shots': 0,  # No shots
-            'Goals': 0,  # No goals
-            'Key Passes': 0,  # No key passes as goalkeeper
-            'Defensive Actions': 6  # Saves during match
-        }
+def team_network(player_name, minutes, until_substitution):
+    """Pass network of the player's team over an inclusive minute range."""
+    from pass_network import build_network
+    return build_network(get_data()['events'], player_team(player_name), minutes=tuple(minutes),
+                         until_substitution=until_substitution)
+
+def _network_title(network, minutes, until_substitution):
+    return (f"{network['team']} Pass Network, minutes {minutes[0]}-{minutes[1]}"
+            + (" until the first substitution" if until_substitution else "")
+            + f"\n({int(network['adjacency'].sum())} completed passes, edges with {NETWORK_MIN_PASSES}+)")
+
+def generate_team_network(player_name, minutes, until_substitution):
+    """Team pass network of the player's team (player highlighted), as an image URL."""
+    from pass_network import draw_network
+    pitch_cache = _plotting()
+    network = team_network(player_name, minutes, until_substitution)
+    fig, ax, pitch = pitch_cache.pitch_figure(PITCH_STYLE, (10, 7), layout='constrained')
+    draw_network(ax, network, min_passes=NETWORK_MIN_PASSES, highlight=player_name)
+    ax.set_title(_network_title(network, minutes, until_substitution), color='white', pad=10, fontsize=12)
+    fig.patch.set_facecolor('#1a1a1a')
    
-    # For other players, use default stats or minimal adjustments based on position/role
-    else:
-        # Default for defenders (e.g., Nicolás Otamendi, Raphaël Varane)
-        if player_name in ["Nicolás Otamendi", "Cristian Romero", "Raphaël Varane", "Dayot Upamecano"]:
-            return {
-                'Total Touches': 60,  # Typical for defenders
-                'Passes Attempted': 40,
-                'Pass Accuracy': "80.0%",  # Decent accuracy
-                'Shots': 0,  # No shots
-                'Goals': 0,  # No goals
-                'Key Passes': 0,  # Few key passes
-                'Defensive Actions': 7  # Tackles, interceptions
-            }
-        # Default for midfielders (e.g., Rodrigo De Paul, Alexis Mac Allister, Adrien Rabiot)
-        elif player_name in ["Rodrigo De Paul", "Alexis Mac Allister", "Adrien Rabiot", "Enzo Fernández"]:
-            return {
-                'Total Touches': 80,  # High involvement
-                'Passes Attempted': 50,
-                'Pass Accuracy': "82.0%",  # Good accuracy
-                'Shots': 1,  # Few shots
-                'Goals': 0,  # No goals
-                'Key Passes': 2,  # Some creativity
-                'Defensive Actions': 5  # Tackles, pressures
-            }
-        # Default for forwards/wingers (e.g., Ousmane Dembélé, Nahuel Molina)
-        else:
-            return {
-                'Total Touches': 55,  # Moderate involvement
-                'Passes Attempted': 20,
-                'Pass Accuracy': "70.0%",  # Lower accuracy, attack-focused
-                'Shots': 2,  # More shots
-                'Goals': 0,  # No goals unless specified
-                'Key Passes': 2,  # Some creativity
-                'Defensive Actions': 1  # Minimal defensively
-            }
+    url = publish(fig)
+    pitch_cache.release(fig)
+    return url
 
-    return base_stats  # Fallback (shouldn't reach here due to above conditions)
+# Plotly render mode: compact figure dicts (no template, rounded values) that the browser draws,
+# a few tens of KB per view instead of a PNG of several hundred
+def _pitch_shapes():
+    """StatsBomb pitch markings (120 x 80) as Plotly layout shapes."""
+    line = {'color': 'white', 'width': 1.5}
+    shapes = [{'type': 'rect', 'x0': x0, 'y0': y0, 'x1': x1, 'y1': y1, 'line': line, 'layer': 'below'}
+              for x0, y0, x1, y1 in [
+                  (0, 0, 120, 80),  # Outline
+                  (0, 18, 18, 62), (102, 18, 120, 62),  # Penalty areas
+                  (0, 30, 6, 50), (114, 30, 120, 50),  # Six-yard boxes
+                  (-2, 36, 0, 44), (120, 36, 122, 44),  # Goals
+              ]]
+    shapes.append({'type': 'line', 'x0': 60, 'y0': 0, 'x1': 60, 'y1': 80, 'line': line, 'layer': 'below'})
+    shapes.append({'type': 'circle', 'x0': 50, 'y0': 30, 'x1': 70, 'y1': 50, 'line': line, 'layer': 'below'})
+    for spot_x in (12, 60, 108):
+        shapes.append({'type': 'circle', 'x0': spot_x - 0.4, 'y0': 39.6, 'x1': spot_x + 0.4, 'y1': 40.4,
+                       'line': line, 'fillcolor': 'white', 'layer': 'below'})
+    # Penalty arcs as quadratic curves (shape paths have no SVG arcs)
+    shapes.append({'type': 'path', 'path': 'M 18,32 Q 26,40 18,48', 'line': line, 'layer': 'below'})
+    shapes.append({'type': 'path', 'path': 'M 102,32 Q 94,40 102,48', 'line': line, 'layer': 'below'})
+    return shapes
+
+def _pitch_figure(traces, title):
+    """Plotly figure dict of ``traces`` on the dark StatsBomb pitch, y axis down as in mplsoccer."""
+    hidden = {'showgrid': False, 'zeroline': False, 'showticklabels': False, 'fixedrange': False}
+    return {
+        'data': traces,
+        'layout': {
+            'title': {'text': title.replace('\n', '<br>'), 'x': 0.5, 'font': {'color': 'white', 'size': 16}},
+            'xaxis': dict(hidden, range=[-3, 123]),
+            'yaxis': dict(hidden, range=[83, -3], scaleanchor='x'),
+            'shapes': _pitch_shapes(),
+            'annotations': [
+                {'x': 5, 'y': 40, 'text': 'Argentina →', 'showarrow': False, 'xanchor': 'left',
+                 'font': {'color': 'white', 'size': 11}},
+                {'x': 115, 'y': 40, 'text': '← France', 'showarrow': False, 'xanchor': 'right',
+                 'font': {'color': 'white', 'size': 11}},
+            ],
+            'paper_bgcolor': '#1a1a1a',
+            'plot_bgcolor': '#1a1a1a',
+            'margin': {'l': 10, 'r': 10, 't': 60, 'b': 10},
+            'showlegend': False,
+            'hovermode': 'closest',
+        },
+    }
+
+def _rounded(values, decimals=1):
+    import numpy as np
+    return np.round(np.asarray(values, dtype=float), decimals).tolist()
+
+def heatmap_figure(player_name):
+    """Plotly version of ``generate_heatmap``: one binned density ``Heatmap`` trace (or the points if few)."""
+    import numpy as np
+    from density import PITCH_LENGTH, PITCH_WIDTH, coarsen, mask_low, smooth
+    from event_index import select
+    data = get_data()
+    player_events = select(data['events'], data['event_index'], player=player_name).dropna(subset=['x'])
+    n_events = len(player_events)
+    if n_events == 0:
+        figure = _pitch_figure([], f"{player_name} Event Heatmap (0 events)")
+        figure['layout']['annotations'].append({'x': 60, 'y': 40, 'text': "No event data available",
+                                                'showarrow': False, 'font': {'color': 'white', 'size': 12}})
+        return figure
+    title = f"{player_name} Event Heatmap\n({n_events} events)"
+    if n_events < 10:
+        trace = {'type': 'scatter', 'mode': 'markers', 'x': _rounded(player_events['x']),
+                 'y': _rounded(player_events['y']), 'marker': {'color': 'red', 'size': 9, 'opacity': 0.7},
+                 'hovertemplate': 'x %{x}, y %{y}<extra></extra>'}
+        return _pitch_figure([trace], title)
+    grid = coarsen(player_grid(player_name), PLOTLY_COARSEN)
+    density = mask_low(smooth(grid, bw_adjust=0.5), thresh=0.2)
+    scaled = np.round(density / density.max(), 3)  # Relative density; three decimals are plenty for colour
+    nx, ny = grid.shape
+    trace = {
+        'type': 'heatmap',
+        'z': [[None if masked else value for value, masked in zip(row, mask_row)]
+              for row, mask_row in zip(scaled.T.data.tolist(), np.ma.getmaskarray(scaled.T).tolist())],
+        'x0': PITCH_LENGTH / nx / 2, 'dx': PITCH_LENGTH / nx,
+        'y0': PITCH_WIDTH / ny / 2, 'dy': PITCH_WIDTH / ny,
+        'colorscale': 'RdYlBu', 'reversescale': True, 'opacity': 0.7, 'zsmooth': 'best',
+        'showscale': False, 'hovertemplate': 'x %{x:.0f}, y %{y:.0f}<br>density %{z:.2f}<extra></extra>',
+    }
+    return _pitch_figure([trace], title)
+
+def _segments(passes):
+    """x and y lists drawing every pass as one segment, separated by gaps (None)."""
+    import numpy as np
+    n = len(passes)
+    x = np.full(3 * n, np.nan)
+    y = np.full(3 * n, np.nan)
+    x[0::3], x[1::3] = passes['x'].to_numpy(dtype=float), passes['end_x'].to_numpy(dtype=float)
+    y[0::3], y[1::3] = passes['y'].to_numpy(dtype=float), passes['end_y'].to_numpy(dtype=float)
+    return ([None if np.isnan(v) else v for v in _rounded(x)],
+            [None if np.isnan(v) else v for v in _rounded(y)])
+
+def pass_network_figure(player_name):
+    """Plotly version of ``generate_pass_network``: one line-segment trace per outcome, end points marked."""
+    from event_index import select
+    data = get_data()
+    player_passes = select(data['events'], data['event_index'], player=player_name, type='Pass')
+    if len(player_passes) == 0:
+        return None
+    successful = player_passes['pass_outcome'].isna()
+    traces = []
+    for passes_subset, color in ((player_passes[successful], 'lime'), (player_passes[~successful], 'red')):
+        drawable = passes_subset[['x', 'y', 'end_x', 'end_y']].dropna()
+        if drawable.empty:
+            continue
+        x, y = _segments(drawable)
+        traces.append({'type': 'scatter', 'mode': 'lines', 'x': x, 'y': y, 'hoverinfo': 'skip',
+                       'line': {'color': color, 'width': 1.5}, 'opacity': 0.5})
+        traces.append({'type': 'scatter', 'mode': 'markers', 'x': _rounded(drawable['end_x']),
+                       'y': _rounded(drawable['end_y']), 'marker': {'color': color, 'size': 5},
+                       'hovertemplate': 'to x %{x}, y %{y}<extra></extra>'})
+    title = (f"{player_name} Pass Network\n({int(successful.sum())} Successful / "
+             f"{int((~successful).sum())} Unsuccessful)")
+    return _pitch_figure(traces, title)
+
+def team_network_figure(player_name, minutes, until_substitution):
+    """Plotly version of ``generate_team_network``: edges in a few width classes, one trace each, then the nodes."""
+    import numpy as np
+    from pass_network import edges, short_name
+    network = team_network(player_name, minutes, until_substitution)
+    x, y, volume = network['x'], network['y'], network['volume']
+    traces = []
+    i, j, count = edges(network, NETWORK_MIN_PASSES)
+    if len(count):
+        weight_class = np.minimum((4 * count / count.max()).astype(int), 3)  # Four line widths
+        for level in range(4):
+            pairs = weight_class == level
+            if not pairs.any():
+                continue
+            seg_x = np.column_stack([x[i[pairs]], x[j[pairs]], np.full(pairs.sum(), np.nan)]).ravel()
+            seg_y = np.column_stack([y[i[pairs]], y[j[pairs]], np.full(pairs.sum(), np.nan)]).ravel()
+            traces.append({'type': 'scatter', 'mode': 'lines', 'hoverinfo': 'skip',
+                           'x': [None if np.isnan(v) else v for v in _rounded(seg_x)],
+                           'y': [None if np.isnan(v) else v for v in _rounded(seg_y)],
+                           'line': {'color': '#00d4ff', 'width': 1.5 + 2 * level}, 'opacity': 0.3 + 0.2 * level})
+    traces.append({
+        'type': 'scatter', 'mode': 'markers+text', 'x': _rounded(x), 'y': _rounded(y),
+        'text': [short_name(p) for p in network['players']], 'textposition': 'top center',
+        'textfont': {'color': 'white', 'size': 10},
+        'customdata': [[p, int(v)] for p, v in zip(network['players'], volume)],
+        'hovertemplate': '%{customdata[0]}<br>%{customdata[1]} passes made + received<extra></extra>',
+        'marker': {'size': (10 + 25 * volume / max(volume.max(), 1)).round(1).tolist() if len(volume) else [],
+                   'color': ['#ffd166' if p == player_name else '#00d4ff' for p in network['players']],
+                   'line': {'color': 'white', 'width': 1.5}},
+    })
+    figure = _pitch_figure(traces, _network_title(network, minutes, until_substitution))
+    figure['layout']['annotations'] = []
+    return figure
+
+def prepare_player_stats(player_name):
+    """The player's match statistics for the Stats tab, from the event-derived stats table."""
+    import player_stats
+    match_id = get_data()['match_id']
+    stats = player_stats.get(match_id, player_name) if match_id is not None else None
+    if stats is None:
+        stats = dict.fromkeys(player_stats.STAT_COLUMNS, 0)
+    return {
+        'Total Touches': stats['touches'],
+        'Passes Attempted': stats['passes_attempted'],
+        'Pass Accuracy': f"{player_stats.pass_accuracy(stats):.1f}%",
+        'Shots': stats['shots'],
+        'Goals': stats['goals'],
+        'Key Passes': stats['key_passes'],
+        'xG': f"{stats['xG']:.2f}",
+        'xA': f"{stats['xA']:.2f}",
+        'Defensive Actions': stats['defensive_actions'],
+    }
 
 # Dash app layout with enhanced styling
 app = dash.Dash(__name__)
+server = app.server  # WSGI entry point, e.g. gunicorn -w 4 -b 0.0.0.0:8050 hmap:server
 
 # Add external CSS for Google Fonts (Roboto) and custom dropdown styling
 app.index_string = '''
@@ -301,135 +483,335 @@ app.index_string = '''
 </html>
 '''
 
-app.layout = html.Div(
-    style={
-        'backgroundColor': '#0d1b2a',  # Darker, richer background
-        'minHeight': '100vh',
-        'padding': '40px',
-        'color': '#ffffff',
-        'fontFamily': 'Roboto, sans-serif',  # Custom font
-    },
-    children=[
-        html.H1(
-            "2022 World Cup Final - Player Analysis Dashboard",
-            style={
-                'textAlign': 'center',
-                'marginBottom': '40px',
-                'fontSize': '36px',
-                'fontWeight': '700',
-                'color': '#00d4ff',  # Bright cyan for title
-                'textShadow': '2px 2px 4px rgba(0, 0, 0, 0.5)',
-            }
-        ),
-       
-        html.Div([
-            html.Label(
-                "Select a Player:",
+def build_layout(players):
+    """Dashboard layout for the given player list."""
+    return html.Div(
+        style={
+            'backgroundColor': '#0d1b2a',  # Darker, richer background
+            'minHeight': '100vh',
+            'padding': '40px',
+            'color': '#ffffff',
+            'fontFamily': 'Roboto, sans-serif',  # Custom font
+        },
+        children=[
+            html.H1(
+                "2022 World Cup Final - Player Analysis Dashboard",
                 style={
-                    'marginBottom': '15px',
-                    'fontSize': '18px',
-                    'fontWeight': '400',
-                    'color': '#e0e0e0',
+                    'textAlign': 'center',
+                    'marginBottom': '40px',
+                    'fontSize': '36px',
+                    'fontWeight': '700',
+                    'color': '#00d4ff',  # Bright cyan for title
+                    'textShadow': '2px 2px 4px rgba(0, 0, 0, 0.5)',
                 }
             ),
-            dcc.Dropdown(
-                id='player-dropdown',
-                options=[{'label': p, 'value': p} for p in players],
-                value=players[0] if players else None,
-                clearable=False,
-                style={
-                    'backgroundColor': '#1b263b',  # Darker dropdown
-                    'color': '#ffffff',  # Ensure selected text is white
-                    'borderRadius': '8px',
-                    'marginBottom': '30px',
-                    'fontSize': '16px',
-                    'border': '1px solid #415a77',  # Subtle border for contrast
-                },
-                optionHeight=40,  # Height of each option for better visibility
-            ),
+       
+            html.Div([
+                html.Label(
+                    "Select a Player:",
+                    style={
+                        'marginBottom': '15px',
+                        'fontSize': '18px',
+                        'fontWeight': '400',
+                        'color': '#e0e0e0',
+                    }
+                ),
+                dcc.Dropdown(
+                    id='player-dropdown',
+                    options=[{'label': p, 'value': p} for p in players],
+                    value=players[0] if players else None,
+                    clearable=False,
+                    style={
+                        'backgroundColor': '#1b263b',  # Darker dropdown
+                        'color': '#ffffff',  # Ensure selected text is white
+                        'borderRadius': '8px',
+                        'marginBottom': '30px',
+                        'fontSize': '16px',
+                        'border': '1px solid #415a77',  # Subtle border for contrast
+                    },
+                    optionHeight=40,  # Height of each option for better visibility
+                ),
            
-            dcc.Tabs(
-                id='visualization-tabs',
-                value='heatmap',
-                children=[
-                    dcc.Tab(label='Heatmap', value='heatmap',
-                            style={
-                                'backgroundColor': '#1b263b',
-                                'color': '#e0e0e0',
-                                'border': 'none',
-                                'padding': '10px',
-                                'fontSize': '16px',
-                            },
-                            selected_style={
-                                'backgroundColor': '#415a77',  # Highlighted tab color
-                                'color': '#ffffff',
-                                'border': 'none',
-                                'fontWeight': '700',
-                            }),
-                    dcc.Tab(label='Pass Network', value='pass-network',
-                            style={
-                                'backgroundColor': '#1b263b',
-                                'color': '#e0e0e0',
-                                'border': 'none',
-                                'padding': '10px',
-                                'fontSize': '16px',
-                            },
-                            selected_style={
-                                'backgroundColor': '#415a77',
-                                'color': '#ffffff',
-                                'border': 'none',
-                                'fontWeight': '700',
-                            }),
-                    dcc.Tab(label='Match Stats', value='stats',
-                            style={
-                                'backgroundColor': '#1b263b',
-                                'color': '#e0e0e0',
-                                'border': 'none',
-                                'padding': '10px',
-                                'fontSize': '16px',
-                            },
-                            selected_style={
-                                'backgroundColor': '#415a77',
-                                'color': '#ffffff',
-                                'border': 'none',
-                                'fontWeight': '700',
-                            }),
-                ],
+                dcc.RadioItems(
+                    id='render-mode',
+                    options=[{'label': 'Image', 'value': 'image'},
+                             {'label': 'Interactive (hover, zoom)', 'value': 'plotly'}],
+                    value=DEFAULT_RENDER_MODE,
+                    inline=True,
+                    inputStyle={'marginRight': '6px', 'marginLeft': '16px'},
+                    style={
+                        'marginBottom': '20px',
+                        'fontSize': '16px',
+                        'color': '#e0e0e0',
+                    }
+                ),
+           
+                dcc.Tabs(
+                    id='visualization-tabs',
+                    value='heatmap',
+                    children=[
+                        dcc.Tab(label='Heatmap', value='heatmap',
+                                style={
+                                    'backgroundColor': '#1b263b',
+                                    'color': '#e0e0e0',
+                                    'border': 'none',
+                                    'padding': '10px',
+                                    'fontSize': '16px',
+                                },
+                                selected_style={
+                                    'backgroundColor': '#415a77',  # Highlighted tab color
+                                    'color': '#ffffff',
+                                    'border': 'none',
+                                    'fontWeight': '700',
+                                }),
+                        dcc.Tab(label='Pass Network', value='pass-network',
+                                style={
+                                    'backgroundColor': '#1b263b',
+                                    'color': '#e0e0e0',
+                                    'border': 'none',
+                                    'padding': '10px',
+                                    'fontSize': '16px',
+                                },
+                                selected_style={
+                                    'backgroundColor': '#415a77',
+                                    'color': '#ffffff',
+                                    'border': 'none',
+                                    'fontWeight': '700',
+                                }),
+                        dcc.Tab(label='Team Pass Network', value='team-network',
+                                style={
+                                    'backgroundColor': '#1b263b',
+                                    'color': '#e0e0e0',
+                                    'border': 'none',
+                                    'padding': '10px',
+                                    'fontSize': '16px',
+                                },
+                                selected_style={
+                                    'backgroundColor': '#415a77',
+                                    'color': '#ffffff',
+                                    'border': 'none',
+                                    'fontWeight': '700',
+                                }),
+                        dcc.Tab(label='Match Stats', value='stats',
+                                style={
+                                    'backgroundColor': '#1b263b',
+                                    'color': '#e0e0e0',
+                                    'border': 'none',
+                                    'padding': '10px',
+                                    'fontSize': '16px',
+                                },
+                                selected_style={
+                                    'backgroundColor': '#415a77',
+                                    'color': '#ffffff',
+                                    'border': 'none',
+                                    'fontWeight': '700',
+                                }),
+                    ],
+                    style={
+                        'borderRadius': '8px',
+                        'overflow': 'hidden',
+                    }
+                ),
+            ]),
+       
+            html.Div(id='visualization-content', style={'marginTop': '40px'}),
+       
+            # Footer with "Made by Team .docx"
+            html.Footer(
+                "Made by Team .docx",
                 style={
-                    'borderRadius': '8px',
-                    'overflow': 'hidden',
+                    'textAlign': 'center',
+                    'marginTop': '50px',
+                    'fontSize': '14px',
+                    'color': '#778da9',  # Muted color for footer
+                    'fontWeight': '400',
                 }
             ),
-        ]),
-       
-        html.Div(id='visualization-content', style={'marginTop': '40px'}),
-       
-        # Footer with "Made by Team .docx"
-        html.Footer(
-            "Made by Team .docx",
+        ]
+    )
+
+def team_network_controls(last_minute=120):
+    """Minute range and substitution filter of the team pass network tab, above its plot."""
+    return html.Div([
+        dcc.RangeSlider(
+            id='network-minutes',
+            min=0,
+            max=last_minute,
+            step=1,
+            value=[0, last_minute],
+            marks={m: {'label': str(m), 'style': {'color': '#e0e0e0'}} for m in range(0, last_minute + 1, 15)},
+            tooltip={'placement': 'bottom'},
+        ),
+        dcc.Checklist(
+            id='network-options',
+            options=[{'label': 'Until the first substitution', 'value': 'until-substitution'}],
+            value=[],
+            inputStyle={'marginRight': '6px'},
             style={
-                'textAlign': 'center',
-                'marginTop': '50px',
-                'fontSize': '14px',
-                'color': '#778da9',  # Muted color for footer
-                'fontWeight': '400',
+                'margin': '20px 0',
+                'fontSize': '16px',
+                'color': '#e0e0e0',
             }
         ),
-    ]
-)
+        html.Div(id='network-content'),
+    ], style={'maxWidth': '900px', 'margin': 'auto'})
+
+def serve_layout():
+    """Build the layout per page load, so match data is read when the dashboard is first opened."""
+    return build_layout(get_data()['players'])
+
+# Skeleton with every component id lets Dash validate the callbacks without loading any data
+app.validation_layout = html.Div([build_layout([]), team_network_controls()])
+app.layout = serve_layout
 
 @app.callback(
     Output('visualization-content', 'children'),
     [Input('visualization-tabs', 'value'),
-     Input('player-dropdown', 'value')]
+     Input('player-dropdown', 'value'),
+     Input('render-mode', 'value')]
 )
-def update_visualization(tab, player):
+def update_visualization(tab, player, mode=DEFAULT_RENDER_MODE):
     if not player:
         raise exceptions.PreventUpdate
-   
+    with interactive.request():
+        return visualization_view(tab, player, mode)
+
+def visualization_view(tab, player, mode=DEFAULT_RENDER_MODE):
+    """Children of one player's tab, from the view cache or rendered into it."""
+    if mode not in RENDER_MODES or tab == 'stats':
+        mode = 'image'
+    data = current_data()
+    params = {
+        'match_id': data['match_id'], 'data_version': data['version'], 'player': player, 'tab': tab,
+        'mode': mode, 'render_version': RENDER_VERSION, 'pitch_style': PITCH_STYLE,
+        'format': http_cache.IMAGE_FORMAT,
+    }
+    if tab == 'stats' and data['match_id'] is not None:
+        import player_stats
+        params['stats_version'] = player_stats.version(data['match_id'])  # Also changes with the xG model
+    return cached_view(params, lambda: render_visualization(tab, player, mode))
+
+def cached_view(params, compute):
+    """Cached callback children, rebuilt if the image they show has since been evicted from the image store."""
+    cache = get_view_cache()
+    children = cache.get_or_compute(params, compute)
+    src = (children.get('props', {}).get('src') or '') if isinstance(children, dict) else ''
+    if src.startswith(IMAGE_URL) and not os.path.exists(os.path.join(IMAGE_DIR, os.path.basename(src))):
+        cache.forget(params)
+        children = cache.get_or_compute(params, compute)
+    return children
+
+@server.route(f'{IMAGE_URL}/<name>')
+def serve_image(name):
+    """Rendered images: content-addressed, so cached by browsers and proxies for good."""
+    return http_cache.send_immutable(IMAGE_DIR, name)
+
+def _graph(figure):
+    return dcc.Graph(
+        figure=figure,
+        config={'displaylogo': False, 'scrollZoom': True},
+        style={
+            'width': '100%',
+            'maxWidth': '900px',
+            'height': '680px',
+            'margin': 'auto',
+            'borderRadius': '12px',
+            'overflow': 'hidden',
+            'boxShadow': '0 6px 12px rgba(0, 0, 0, 0.3)',
+        }
+    )
+
+@app.callback(
+    Output('network-content', 'children'),
+    [Input('network-minutes', 'value'),
+     Input('network-options', 'value'),
+     Input('player-dropdown', 'value'),
+     Input('render-mode', 'value')]
+)
+def update_team_network(minutes, options, player, mode=DEFAULT_RENDER_MODE):
+    if not player or not minutes:
+        raise exceptions.PreventUpdate
+    with interactive.request():
+        return team_network_view(player, minutes, 'until-substitution' in (options or []), mode)
+
+def team_network_view(player, minutes, until_substitution=False, mode=DEFAULT_RENDER_MODE):
+    """Children of the team pass network plot, from the view cache or rendered into it."""
+    if mode not in RENDER_MODES:
+        mode = 'image'
+    minutes = [int(minutes[0]), int(minutes[1])]
+    data = current_data()
+    params = {
+        'match_id': data['match_id'], 'data_version': data['version'], 'player': player, 'tab': 'team-network',
+        'minutes': minutes, 'until_substitution': until_substitution, 'min_passes': NETWORK_MIN_PASSES,
+        'mode': mode, 'render_version': RENDER_VERSION, 'pitch_style': PITCH_STYLE,
+        'format': http_cache.IMAGE_FORMAT,
+    }
+    return cached_view(params, lambda: render_team_network(player, minutes, until_substitution, mode))
+
+def last_minute():
+    """End of the team network's minute slider: 120, or later if the match ran on."""
+    events = get_data()['events']
+    return max(120, int(events['minute'].max())) if len(events) else 120
+
+def warm_up_views(workers=VIEW_WARMUP_WORKERS):
+    """Render every player x tab into the view cache (the default render mode first), yielding to callbacks."""
+    players = current_data()['players']
+    modes = [DEFAULT_RENDER_MODE] + [mode for mode in RENDER_MODES if mode != DEFAULT_RENDER_MODE]
+    tasks = [(tab, player, mode) for mode in modes for player in players
+             for tab in ('heatmap', 'pass-network', 'team-network', 'stats')
+             if not (tab == 'stats' and mode != modes[0])]  # The stats card is the same in both modes
+    full_match = [0, last_minute()]
+
+    def run(task):
+        tab, player, mode = task
+        if tab == 'team-network':
+            team_network_view(player, full_match, False, mode)  # The tab opens on the whole match
+        visualization_view(tab, player, mode)
+
+    print(f"Warming up {len(tasks)} views of {len(players)} players on {workers} threads")
+    return startup.run_pool(tasks, run, "hmap view warm-up", workers=workers, gate=interactive)
+
+def render_team_network(player, minutes, until_substitution, mode='image'):
+    """Dash children of the team pass network plot, built from scratch."""
+    if player_team(player) is None:
+        return html.Div(
+            f"No events available for {player}",
+            style={
+                'textAlign': 'center',
+                'color': '#e0e0e0',
+                'fontSize': '18px',
+                'padding': '20px',
+            }
+        )
+    if mode == 'plotly':
+        return _graph(team_network_figure(player, minutes, until_substitution))
+    return html.Img(
+        src=generate_team_network(player, minutes, until_substitution),
+        style={
+            'width': '100%',
+            'maxWidth': '900px',
+            'margin': 'auto',
+            'display': 'block',
+            'borderRadius': '12px',
+            'boxShadow': '0 6px 12px rgba(0, 0, 0, 0.3)',
+        }
+    )
+
+def render_visualization(tab, player, mode='image'):
+    """Dash children for one player's tab, built from scratch (``mode`` 'plotly' draws in the browser)."""
+    if tab == 'team-network':
+        return team_network_controls(last_minute())
+    if tab == 'heatmap' and mode == 'plotly':
+        return _graph(heatmap_figure(player))
+
+    if tab == 'pass-network' and mode == 'plotly':
+        figure = pass_network_figure(player)
+        if figure:
+            return _graph(figure)  # Otherwise the image mode's "no pass data" message below
+
     if tab == 'heatmap':
         return html.Img(
-            src=f"data:image/png;base64,{generate_heatmap(player)}",
+            src=generate_heatmap(player),
             style={
                 'width': '100%',
                 'maxWidth': '900px',  # Slightly larger for better visibility
@@ -444,7 +826,7 @@ def update_visualization(tab, player):
         pass_network = generate_pass_network(player)
         if pass_network:
             return html.Img(
-                src=f"data:image/png;base64,{pass_network}",
+                src=pass_network,
                 style={
                     'width': '100%',
                     'maxWidth': '900px',
@@ -527,4 +909,10 @@ def update_visualization(tab, player):
         ])
 
 if __name__ == '__main__':
+    # Opt-in (AI_COACH_WARMUP=1): load match data in the background instead of on the first page load
+    if startup.WARMUP:
+        startup.warm_up(get_data, "hmap data warm-up")
+    if VIEW_WARMUP:
+        startup.warm_up(warm_up_views, "hmap view warm-up")
+    startup.report("hmap start-up")
     app.run_server(host="0.0.0.0", port=8050, debug=False)
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""HTTP caching for generated images.
+
+Generated images are stored under the hash of their bytes (or of everything
+that determines them), so a URL always names the same content. Such files are
+sent with that hash as a strong ``ETag`` and ``Cache-Control: immutable`` for a
+year: browsers and proxies keep them without revalidating, and a conditional
+GET (``If-None-Match``) that does reach the server is answered ``304`` without
+reading the file. Other static files get an ``ETag`` and ``no-cache``, so they
+are revalidated but not re-sent.
+
+With ``AI_COACH_WEBP=1`` the apps encode images as WebP instead of PNG,
+typically a third of the size.
+"""
+import hashlib
+import os
+
+from flask import abort, send_from_directory
+
+IMAGE_FORMAT = 'webp' if os.environ.get('AI_COACH_WEBP', '').lower() in ('1', 'true', 'yes') else 'png'
+SAVE_KWARGS = {'webp': {'pil_kwargs': {'quality': 90, 'method': 4}}, 'png': {}}  # Extra fig.savefig arguments
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def content_key(data):
+    """Hex digest naming ``data`` (bytes) in a content-addressed store."""
+    return hashlib.sha256(data).hexdigest()[:24]
+
+
+def send_immutable(directory, filename):
+    """Send a content-addressed file: strong ETag from its name, cached for a year, 304 on a match."""
+    if not os.path.isfile(os.path.join(directory, filename)):  # send_from_directory also rejects unsafe paths
+        abort(404)
+    response = send_from_directory(directory, filename, etag=os.path.splitext(os.path.basename(filename))[0],
+                                   max_age=IMMUTABLE_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def send_revalidated(directory, filename):
+    """Send a file that may change in place: ETag and ``no-cache``, so repeat loads get a 304."""
+    response = send_from_directory(directory, filename, conditional=True)
+    response.cache_control.no_cache = True
+    return response
@@ -3,9 +3,15 @@ from dash import dcc, html, Input, Output
 import plotly.graph_objs as go
 import pandas as pd
 import numpy as np
+import os
 import random
-from sklearn.linear_model import LogisticRegression
-from statsbombpy import sb
+import threading
+import match_store
+import startup
+import player_stats
+import tactic_rules
+import xg_model
+from live_feed import LiveFeed, match_payloads
 
 # Constants
 FIELD_LENGTH = 105
@@ -19,25 +25,13 @@ def convert_coords(sb_x, sb_y):
 # -------------------------
 # StatsBomb Data Acquisition
 # -------------------------
-events = sb.events(match_id=3869685)
-
-# Extract shot data for xG model training
-shots_df = events[events['type'] == 'Shot'].copy()
-shots_df['distance'] = np.sqrt((120 - shots_df['location'].apply(lambda x: x[0])) ** 2 +
-                               (40 - shots_df['location'].apply(lambda x: x[1])) ** 2)
-shots_df['angle'] = np.arctan2(40 - shots_df['location'].apply(lambda x: x[1]),
-                               120 - shots_df['location'].apply(lambda x: x[0])).abs() * 180 / np.pi
-shots_df['goal'] = shots_df['shot_outcome'].apply(lambda x: 1 if x == 'Goal' else 0)
-
-# Train a simple xG model
-X = shots_df[['distance', 'angle']]
-y = shots_df['goal']
-xg_model = LogisticRegression().fit(X, y)
-shots_df['xG'] = xg_model.predict_proba(X)[:, 1]
+events = match_store.load_events(match_id=3869685, categorical=True)
+
+# Shots with xG from the shared model (cached in the match store)
+shots_df = xg_model.load_shots(match_id=3869685, categorical=True)
 
 # Convert shot locations to dashboard coordinates (105x68)
-shots_df['dashboard_x'] = shots_df['location'].apply(lambda loc: convert_coords(loc[0], loc[1])[0])
-shots_df['dashboard_y'] = shots_df['location'].apply(lambda loc: convert_coords(loc[0], loc[1])[1])
+shots_df['dashboard_x'], shots_df['dashboard_y'] = convert_coords(shots_df['x'], shots_df['y'])
 
 # Compute optimal positions for each team based on high xG shots
 argentina_high_xg_shots = shots_df[(shots_df['team'] == 'Argentina') & (shots_df['xG'] > 0.3)]
@@ -64,6 +58,20 @@ teams_df = pd.DataFrame({
 })
 teams_df['xG_Differential'] = teams_df['Offensive_xG'] - teams_df['Defensive_xG']
 
+# -------------------------
+# Live Event Feed
+# -------------------------
+# With AI_COACH_FEED_URL set (e.g. http://127.0.0.1:8765/events from `python live_feed.py`) events
+# stream in from the replay server; otherwise each interval tick steps through the stored match.
+FEED_URL = os.environ.get('AI_COACH_FEED_URL')
+feed = LiveFeed(FEED_URL, capacity=2000, xg_fn=xg_model.event_xg)
+replay_payloads = match_payloads(events)
+if FEED_URL:
+    feed.start()
+last_seq = 0  # Last feed sequence number applied to player_positions
+last_tick = None  # Interval count of the last simulated feed event
+positions_lock = threading.Lock()
+
 # -------------------------
 # Player Data and Initial Positions
 # -------------------------
@@ -111,23 +119,51 @@ france_positions = {
 
 player_positions = {**argentina_positions, **france_positions}
 
-# Player stats for tactical adjustments (example data)
-player_past_stats = {
-    "Lionel Messi": {"matches": 6, "goals": 5, "assists": 3, "passes": 320, "avg_rating": 8.4},
-    "Julian Alvarez": {"matches": 6, "goals": 4, "assists": 0, "passes": 180, "avg_rating": 7.9},
-    "Angel Di Maria": {"matches": 4, "goals": 1, "assists": 1, "passes": 120, "avg_rating": 7.5},
-    "Rodrigo De Paul": {"matches": 6, "goals": 0, "assists": 1, "passes": 290, "avg_rating": 7.6},
-    "Leandro Paredes": {"matches": 5, "goals": 0, "assists": 0, "passes": 200, "avg_rating": 7.3},
-    "Alexis Mac Allister": {"matches": 6, "goals": 1, "assists": 1, "passes": 250, "avg_rating": 7.7},
-    "Emiliano Martinez": {"matches": 6, "goals": 0, "assists": 0, "passes": 50, "avg_rating": 7.2},
-    "Cristian Romero": {"matches": 6, "goals": 0, "assists": 0, "passes": 120, "avg_rating": 7.5},
-    "Nicolas Otamendi": {"matches": 6, "goals": 0, "assists": 0, "passes": 180, "avg_rating": 7.4},
-    "Nicolas Tagliafico": {"matches": 5, "goals": 0, "assists": 0, "passes": 150, "avg_rating": 7.3},
-    "Nahuel Molina": {"matches": 6, "goals": 1, "assists": 1, "passes": 170, "avg_rating": 7.4}
-}
+# Tournament stats for tactical adjustments: each player's totals over the stored World Cup 2022
+# matches, from the event-derived stats tables (names matched to the StatsBomb full names).
+# Building them may build stats tables and train the xG model, so it runs in a background
+# thread (started with the app, or by the first lookup) and lookups never wait for it
+_past_stats = None
+_past_stats_loading = None
+_past_stats_lock = threading.Lock()
+
+def season_match_ids():
+    """Stored World Cup 2022 matches; every stored match when the season's match list was never fetched."""
+    if match_store.has_matches(competition_id=43, season_id=106):
+        return player_stats.season_match_ids(competition_id=43, season_id=106)
+    return match_store.stored_match_ids() or [match_store.WORLD_CUP_FINAL]
+
+def load_past_stats():
+    """Build the players' tournament totals (empty if the stored matches cannot provide them)."""
+    global _past_stats
+    try:
+        season_stats = player_stats.totals(season_match_ids())
+    except Exception as e:
+        print(f"Player season stats unavailable: {type(e).__name__}: {e}")
+        season_stats = {}
+    stats = {}
+    for name in player_positions:
+        full_name = player_stats.resolve_player(name, season_stats)
+        if full_name:
+            stats[name] = season_stats[full_name]
+    _past_stats = stats
+
+def start_past_stats():
+    """Start building the tournament totals in the background, once."""
+    global _past_stats_loading
+    with _past_stats_lock:
+        if _past_stats_loading is None:
+            _past_stats_loading = startup.warm_up(load_past_stats, "live season stats")
+
+def past_stats():
+    """``{display name: tournament totals}`` of the players on the pitch; empty until the background build ends."""
+    if _past_stats is None:
+        start_past_stats()
+        return {}
+    return _past_stats
 
 # Map player IDs to names from lineups
-lineups = sb.lineups(match_id=3869685)
+lineups = match_store.load_lineups(match_id=3869685)
 player_id_to_name = {}
 for team in lineups:
     for _, row in lineups[team].iterrows():
@@ -184,19 +220,13 @@ def get_player_bounds(player):
         else:
             return (0, 52.5, 0, 68)
 
-def update_player_positions(n):
-    """Update player positions smoothly with occasional aggressive movement."""
-    current_event = events.iloc[n % len(events)]
-    smoothing_factor = 0.3  # Adjust for smoother transitions (0 to 1, lower = smoother)
-    aggressive_chance = 0.2  # 20% chance for aggressive movement
-
-    # Players to update based on event
+def apply_event(current_event, smoothing_factor):
+    """Move the event's player (and a pass recipient) toward the event location; return who moved."""
     players_to_set = []
-    if 'player_id' in current_event and current_event['player_id'] in player_id_to_name:
+    if current_event.get('player_id') in player_id_to_name:
         player_name = player_id_to_name[current_event['player_id']]
-        if player_name in player_positions and 'location' in current_event:
-            sb_x, sb_y = current_event['location']
-            target_x, target_y = convert_coords(sb_x, sb_y)
+        if player_name in player_positions and current_event.get('x') is not None:
+            target_x, target_y = convert_coords(current_event['x'], current_event['y'])
             x, y = player_positions[player_name]
             # Smoothly interpolate toward event location
             new_x = x + smoothing_factor * (target_x - x)
@@ -204,20 +234,41 @@ def update_player_positions(n):
             player_positions[player_name] = (new_x, new_y)
             players_to_set.append(player_name)
 
-    if current_event['type'] == 'Pass' and 'pass_recipient_id' in current_event:
+    if current_event.get('type') == 'Pass' and current_event.get('pass_recipient_id') is not None:
         recipient_id = current_event['pass_recipient_id']
         if recipient_id in player_id_to_name:
             recipient_name = player_id_to_name[recipient_id]
-            if recipient_name in player_positions and 'pass_end_location' in current_event:
-                sb_x, sb_y = current_event['pass_end_location']
-                target_x, target_y = convert_coords(sb_x, sb_y)
+            if recipient_name in player_positions and current_event.get('end_x') is not None:
+                target_x, target_y = convert_coords(current_event['end_x'], current_event['end_y'])
                 x, y = player_positions[recipient_name]
                 # Smoothly interpolate toward pass end location
                 new_x = x + smoothing_factor * (target_x - x)
                 new_y = y + smoothing_factor * (target_y - y)
                 player_positions[recipient_name] = (new_x, new_y)
                 players_to_set.append(recipient_name)
+    return players_to_set
+
+def update_player_positions(n):
+    """Apply the feed events received since the last tick, then move everyone else smoothly."""
+    global last_seq, last_tick
+    smoothing_factor = 0.3  # Adjust for smoother transitions (0 to 1, lower = smoother)
+    aggressive_chance = 0.2  # 20% chance for aggressive movement
 
+    with positions_lock:
+        if not FEED_URL and n != last_tick:  # Clicks re-run this callback with the same n
+            last_tick = n
+            feed.append(replay_payloads[n % len(replay_payloads)][1])  # Simulated feed: one stored event per tick
+        new_events = feed.events_since(last_seq)
+        if new_events:
+            last_seq = new_events[-1][0]
+        # Players to update based on events
+        players_to_set = []
+        for _, current_event in new_events:
+            players_to_set += apply_event(current_event, smoothing_factor)
+        move_other_players(players_to_set, smoothing_factor, aggressive_chance)
+
+def move_other_players(players_to_set, smoothing_factor, aggressive_chance):
+    """Smooth random movement for players the latest events did not place."""
     # Add smooth random movement for other players with occasional aggressive bursts
     for player in player_positions:
         if player not in players_to_set:
@@ -242,151 +293,70 @@ def update_player_positions(n):
             new_y = max(y_min, min(new_y, y_max))
             player_positions[player] = (new_x, new_y)
 
-def ai_tactic_and_position(player, team):
-    """Suggest detailed tactics and optimal positions based on player role, team situation, and stats."""
-    # Extract player role and data
-    role = player_roles[player]
-    player_data = player_past_stats.get(player, {})
-    team_data = teams_df[teams_df['Team'] == team].iloc[0]
-    x, y = player_positions[player]  # Current position
-
-    # Determine optimal position based on role and team
+def optimal_position(role, team):
+    """Optimal (x, y) for a role, from each team's high-xG shot locations."""
     if role == 'FWD':
         if team == 'Argentina':
-            optimal_x, optimal_y = argentina_optimal_x, argentina_optimal_y
-        else:
-            optimal_x, optimal_y = france_optimal_x, france_optimal_y
+            return argentina_optimal_x, argentina_optimal_y
+        return france_optimal_x, france_optimal_y
     elif role == 'DEF':
         if team == 'Argentina':
-            optimal_x, optimal_y = france_optimal_x, france_optimal_y  # Defend opponent's high xG area
-        else:
-            optimal_x, optimal_y = argentina_optimal_x, argentina_optimal_y
+            return france_optimal_x, france_optimal_y  # Defend opponent's high xG area
+        return argentina_optimal_x, argentina_optimal_y
     elif role == 'MID':
-        if team == 'Argentina':
-            optimal_x = (argentina_optimal_x + france_optimal_x) / 2
-            optimal_y = (argentina_optimal_y + france_optimal_y) / 2
-        else:
-            optimal_x = (france_optimal_x + argentina_optimal_x) / 2
-            optimal_y = (france_optimal_y + argentina_optimal_y) / 2
+        return (argentina_optimal_x + france_optimal_x) / 2, (argentina_optimal_y + france_optimal_y) / 2
     elif role == 'GK':
         if team == 'Argentina':
-            optimal_x, optimal_y = 5, 34  # Near Argentina's goal
-        else:
-            optimal_x, optimal_y = 100, 34  # Near France's goal
-
-    # Role-based tactical suggestions (10+ per role)
-    if role == 'FWD':
-        if team_data['xG_Differential'] > 0.5:
-            if x < optimal_x - 10:
-                tactic = f"Surge forward to ({optimal_x:.1f}, {optimal_y:.1f}). Your team’s lead (xG diff {team_data['xG_Differential']:.2f}) opens gaps—exploit them with pace."
-            elif abs(y - 34) > 15:
-                tactic = f"Cut inside to ({optimal_x:.1f}, {optimal_y:.1f}). Dominance (xG diff {team_data['xG_Differential']:.2f}) lets you attack centrally—unleash a shot."
-            elif x > 85:
-                tactic = f"Hold position near ({optimal_x:.1f}, {optimal_y:.1f}). With xG lead ({team_data['xG_Differential']:.2f}), draw defenders out for teammates."
-            elif random.random() < 0.3:
-                tactic = f"Drop back slightly from ({x:.1f}, {y:.1f}) to link play. Your edge (xG diff {team_data['xG_Differential']:.2f}) allows space creation."
-            else:
-                tactic = f"Push to ({optimal_x:.1f}, {optimal_y:.1f}). Team’s dominance (xG diff {team_data['xG_Differential']:.2f})—finish clinically in the box."
-        else:
-            if x < optimal_x - 10:
-                tactic = f"Advance cautiously to ({optimal_x:.1f}, {optimal_y:.1f}). Tight game (xG diff {team_data['xG_Differential']:.2f})—wait for openings."
-            elif abs(y - 34) > 15:
-                tactic = f"Drift to ({optimal_x:.1f}, {optimal_y:.1f}). Close match (xG diff {team_data['xG_Differential']:.2f})—exploit wide gaps."
-            elif x > 85:
-                tactic = f"Stay near ({optimal_x:.1f}, {optimal_y:.1f}). Even contest (xG diff {team_data['xG_Differential']:.2f})—hold for a counter."
-            elif random.random() < 0.3:
-                tactic = f"Track back from ({x:.1f}, {y:.1f}) to support. Tight (xG diff {team_data['xG_Differential']:.2f})—help midfield."
-            else:
-                tactic = f"Move to ({optimal_x:.1f}, {optimal_y:.1f}). Balanced game (xG diff {team_data['xG_Differential']:.2f})—strike when ready."
-
-    elif role == 'DEF':
-        if team_data['xG_Differential'] > 0.5:
-            if x > optimal_x + 10:
-                tactic = f"Push up to ({optimal_x:.1f}, {optimal_y:.1f}). Lead (xG diff {team_data['xG_Differential']:.2f})—press their forwards high."
-            elif abs(y - optimal_y) > 10:
-                tactic = f"Shift to ({optimal_x:.1f}, {optimal_y:.1f}). Advantage (xG diff {team_data['xG_Differential']:.2f})—cover wide threats."
-            elif x < 20:
-                tactic = f"Hold at ({x:.1f}, {y:.1f}). Strong xG ({team_data['xG_Differential']:.2f})—block counters early."
-            elif random.random() < 0.3:
-                tactic = f"Step up from ({x:.1f}, {y:.1f}) to intercept. Lead (xG diff {team_data['xG_Differential']:.2f})—disrupt their rhythm."
-            else:
-                tactic = f"Anchor at ({optimal_x:.1f}, {optimal_y:.1f}). Edge (xG diff {team_data['xG_Differential']:.2f})—lock down the danger zone."
-        else:
-            if x > optimal_x + 10:
-                tactic = f"Drop to ({optimal_x:.1f}, {optimal_y:.1f}). Tight (xG diff {team_data['xG_Differential']:.2f})—stay compact."
-            elif abs(y - optimal_y) > 10:
-                tactic = f"Adjust to ({optimal_x:.1f}, {optimal_y:.1f}). Close (xG diff {team_data['xG_Differential']:.2f})—mark wingers."
-            elif x < 20:
-                tactic = f"Stay deep at ({x:.1f}, {y:.1f}). Even (xG diff {team_data['xG_Differential']:.2f})—protect the box."
-            elif random.random() < 0.3:
-                tactic = f"Hold position at ({x:.1f}, {y:.1f}). Tight (xG diff {team_data['xG_Differential']:.2f})—watch for runners."
-            else:
-                tactic = f"Guard ({optimal_x:.1f}, {optimal_y:.1f}). Close game (xG diff {team_data['xG_Differential']:.2f})—block shots."
-
-    elif role == 'MID':
-        if team_data['xG_Differential'] > 0.5:
-            if x < 40:
-                tactic = f"Push to ({optimal_x:.1f}, {optimal_y:.1f}). Lead (xG diff {team_data['xG_Differential']:.2f})—drive play forward."
-            elif abs(y - 34) > 20:
-                tactic = f"Move to ({optimal_x:.1f}, {optimal_y:.1f}). Edge (xG diff {team_data['xG_Differential']:.2f})—exploit wide spaces."
-            elif x > 70:
-                tactic = f"Support attack at ({optimal_x:.1f}, {optimal_y:.1f}). Lead (xG diff {team_data['xG_Differential']:.2f})—feed forwards."
-            elif random.random() < 0.3:
-                tactic = f"Drop to ({x:.1f}, {y:.1f}) to recycle. Advantage (xG diff {team_data['xG_Differential']:.2f})—keep possession."
-            else:
-                tactic = f"Control ({optimal_x:.1f}, {optimal_y:.1f}). Dominance (xG diff {team_data['xG_Differential']:.2f})—stretch their midfield."
-        else:
-            if x < 40:
-                tactic = f"Advance to ({optimal_x:.1f}, {optimal_y:.1f}). Tight (xG diff {team_data['xG_Differential']:.2f})—link defense and attack."
-            elif abs(y - 34) > 20:
-                tactic = f"Shift to ({optimal_x:.1f}, {optimal_y:.1f}). Close (xG diff {team_data['xG_Differential']:.2f})—cover flanks."
-            elif x > 70:
-                tactic = f"Hold at ({optimal_x:.1f}, {optimal_y:.1f}). Even (xG diff {team_data['xG_Differential']:.2f})—support counters."
-            elif random.random() < 0.3:
-                tactic = f"Stay at ({x:.1f}, {y:.1f}) to shield. Tight (xG diff {team_data['xG_Differential']:.2f})—break their press."
-            else:
-                tactic = f"Pivot at ({optimal_x:.1f}, {optimal_y:.1f}). Close game (xG diff {team_data['xG_Differential']:.2f})—maintain balance."
-
-    elif role == 'GK':
-        if team_data['xG_Differential'] > 0.5:
-            if x > 10 and team == 'Argentina':
-                tactic = f"Move to ({optimal_x:.1f}, {optimal_y:.1f}). Lead (xG diff {team_data['xG_Differential']:.2f})—play out confidently."
-            elif x < 95 and team == 'France':
-                tactic = f"Shift to ({optimal_x:.1f}, {optimal_y:.1f}). Edge (xG diff {team_data['xG_Differential']:.2f})—start attacks."
-            elif abs(y - 34) > 5:
-                tactic = f"Adjust to ({optimal_x:.1f}, {optimal_y:.1f}). Lead (xG diff {team_data['xG_Differential']:.2f})—cover angles."
-            elif random.random() < 0.3:
-                tactic = f"Stay at ({x:.1f}, {y:.1f}) to organize. Advantage (xG diff {team_data['xG_Differential']:.2f})—direct defense."
-            else:
-                tactic = f"Command ({optimal_x:.1f}, {optimal_y:.1f}). Dominance (xG diff {team_data['xG_Differential']:.2f})—distribute accurately."
-        else:
-            if x > 10 and team == 'Argentina':
-                tactic = f"Drop to ({optimal_x:.1f}, {optimal_y:.1f}). Tight (xG diff {team_data['xG_Differential']:.2f})—stay alert."
-            elif x < 95 and team == 'France':
-                tactic = f"Move to ({optimal_x:.1f}, {optimal_y:.1f}). Close (xG diff {team_data['xG_Differential']:.2f})—anticipate shots."
-            elif abs(y - 34) > 5:
-                tactic = f"Shift to ({optimal_x:.1f}, {optimal_y:.1f}). Even (xG diff {team_data['xG_Differential']:.2f})—watch crosses."
-            elif random.random() < 0.3:
-                tactic = f"Hold at ({x:.1f}, {y:.1f}) to organize. Tight (xG diff {team_data['xG_Differential']:.2f})—keep defense tight."
-            else:
-                tactic = f"Guard ({optimal_x:.1f}, {optimal_y:.1f}). Close game (xG diff {team_data['xG_Differential']:.2f})—make key saves."
-
-    # Player-specific advice based on stats
-    if player_data.get('goals', 0) > 2:
-        player_advice = "You’re in top scoring form—unleash more shots and test their keeper."
-    elif player_data.get('assists', 0) > 1:
-        player_advice = "Your vision is key—seek out runners and deliver killer passes."
-    elif player_data.get('passes', 0) > 100:
-        player_advice = "Master of possession—keep the ball moving and control the game’s rhythm."
-    elif player_data.get('avg_rating', 0) > 7.5:
-        player_advice = "You’re a standout—step up, inspire the team, and drive us forward."
-    else:
-        player_advice = "Stay composed and disciplined—focus on teamwork to turn the tide."
-
-    # Combine tactic and advice
-    suggestion = f"{tactic} {player_advice}"
-
-    return suggestion, (optimal_x, optimal_y)
+            return 5, 34  # Near Argentina's goal
+        return 100, 34  # Near France's goal
+
+def player_rule_metrics():
+    """Metrics the live rules can use, one cell per player at their current position."""
+    players = list(player_positions)
+    team = np.array(['Argentina' if p in argentina_players else 'France' for p in players], dtype=object)
+    role = np.array([player_roles[p] for p in players], dtype=object)
+    with positions_lock:
+        x, y = np.array([player_positions[p] for p in players], dtype=np.float64).T
+    optimal_x, optimal_y = np.array([optimal_position(r, t) for r, t in zip(role, team)], dtype=np.float64).T
+    stats = past_stats()
+    past = [stats.get(p, {}) for p in players]
+    return players, {
+        'role': role,
+        'team': team,
+        'xG_diff': teams_df.set_index('Team')['xG_Differential'].reindex(team).to_numpy(),
+        'x': x,
+        'y': y,
+        'optimal_x': optimal_x,
+        'optimal_y': optimal_y,
+        'y_from_center': np.abs(y - 34),
+        'y_from_optimal': np.abs(y - optimal_y),
+        'chance': np.random.random(len(players)),  # For the "now and then" rules
+        'goals': np.array([s.get('goals', 0) for s in past]),
+        'assists': np.array([s.get('assists', 0) for s in past]),
+        'passes': np.array([s.get('passes_attempted', 0) for s in past]),
+        'xg_xa_per_match': np.array([(s.get('xG', 0) + s.get('xA', 0)) / max(s.get('matches', 0), 1) for s in past]),
+    }
+
+def player_tactics():
+    """Tactical plan and optimal position for every player, from the rules in rules/live_tactic.json and
+    rules/live_advice.json evaluated for all players in one pass."""
+    players, metrics = player_rule_metrics()
+    tactic_table = tactic_rules.load('live_tactic')
+    advice_table = tactic_rules.load('live_advice')
+    tactic_rule = tactic_rules.evaluate(tactic_table, metrics)
+    advice_rule = tactic_rules.evaluate(advice_table, metrics)
+    plans = {}
+    for i, player in enumerate(players):
+        _, tactic = tactic_rules.describe(tactic_table, tactic_rule, metrics, (i,))
+        _, advice = tactic_rules.describe(advice_table, advice_rule, metrics, (i,))
+        # Combine tactic and advice
+        suggestion = " ".join(part['text'] for part in (tactic, advice) if part)
+        plans[player] = suggestion, (float(metrics['optimal_x'][i]), float(metrics['optimal_y'][i]))
+    return plans
+
+def ai_tactic_and_position(player):
+    """Suggest detailed tactics and optimal positions based on player role, team situation, and stats."""
+    return player_tactics()[player]
 
 def create_pitch_figure(selected_player=None):
     """Create the pitch visualization with player positions and football field markings."""
@@ -431,8 +401,7 @@ def create_pitch_figure(selected_player=None):
         ))
        
         if selected_player == player and player in argentina_players:
-            team = 'Argentina'
-            _, (opt_x, opt_y) = ai_tactic_and_position(player, team)
+            _, (opt_x, opt_y) = ai_tactic_and_position(player)
             traces.append(go.Scatter(
                 x=[x, opt_x], y=[y, opt_y], mode="lines+markers",
                 line=dict(color="yellow", width=2, dash="dash"),
@@ -466,6 +435,7 @@ app.layout = html.Div([
                             'borderRadius': '10px', 'boxShadow': '2px 2px 8px rgba(0,0,0,0.1)'})
         ], style={'width': '23%', 'display': 'inline-block', 'marginLeft': '2%', 'verticalAlign': 'top'})
     ]),
+    html.Div(id='team-stats', style={'marginTop': '10px', 'fontSize': '14px'}),
     html.Div([
         html.Span("Argentina", style={'color': 'blue', 'fontSize': '20px', 'position': 'absolute', 'left': '10%', 'bottom': '5px'}),
         html.Span("France", style={'color': 'red', 'fontSize': '20px', 'position': 'absolute', 'right': '45%', 'bottom': '5px'})
@@ -494,10 +464,9 @@ def display_player_details(clickData):
         return "Click a player marker to see stats."
    
     player = clickData['points'][0]['customdata']
-    stats = player_past_stats.get(player, {})
+    stats = past_stats().get(player, {})
     x, y = player_positions[player]
-    team = 'Argentina' if player in argentina_players else 'France'
-    tactic, (opt_x, opt_y) = ai_tactic_and_position(player, team)
+    tactic, (opt_x, opt_y) = ai_tactic_and_position(player)
    
     details = [
         html.H4(player, style={'color': '#2c3e50', 'marginBottom': '10px'}),
@@ -505,8 +474,9 @@ def display_player_details(clickData):
         html.P(f"Matches: {stats.get('matches', 0)}", style={'fontSize': '14px', 'color': '#555'}),
         html.P(f"Goals: {stats.get('goals', 0)}", style={'fontSize': '14px', 'color': '#555'}),
         html.P(f"Assists: {stats.get('assists', 0)}", style={'fontSize': '14px', 'color': '#555'}),
-        html.P(f"Passes: {stats.get('passes', 0)}", style={'fontSize': '14px', 'color': '#555'}),
-        html.P(f"Avg Rating: {stats.get('avg_rating', 0.0)}", style={'fontSize': '14px', 'color': '#555'}),
+        html.P(f"Passes: {stats.get('passes_attempted', 0)} ({player_stats.pass_accuracy(stats) if stats else 0.0:.1f}% completed)",
+               style={'fontSize': '14px', 'color': '#555'}),
+        html.P(f"xG: {stats.get('xG', 0.0):.2f}, xA: {stats.get('xA', 0.0):.2f}", style={'fontSize': '14px', 'color': '#555'}),
         html.Div([
             html.Strong("Tactical Plan: ", style={'color': '#e74c3c'}),
             html.Span(tactic, style={'backgroundColor': '#e74c3c', 'color': 'white', 'padding': '5px 10px',
@@ -516,9 +486,34 @@ def display_player_details(clickData):
     ]
     return details
 
+@app.callback(
+    Output('team-stats', 'children'),
+    Input('interval-component', 'n_intervals')
+)
+def display_team_stats(n):
+    """Running team totals from the live feed, plus delivery latency when streaming."""
+    snapshot = feed.snapshot()
+    rows = []
+    for team in ['Argentina', 'France']:
+        stats = snapshot.get(team)
+        if not stats:
+            continue
+        completion = 100 * stats['Completed Passes'] / stats['Passes'] if stats['Passes'] else 0.0
+        rows.append(html.P(
+            f"{team}: {stats['Goals']} goals, {stats['Shots']} shots, xG {stats['xG']:.2f}, "
+            f"passes {stats['Passes']} ({completion:.0f}% completed)",
+            style={'margin': '4px 0'}))
+    latency = feed.latency_ms()
+    if latency:
+        rows.append(html.P(f"Feed latency: median {latency[0]:.1f} ms, p95 {latency[1]:.1f} ms",
+                           style={'margin': '4px 0', 'color': '#777'}))
+    return rows
+
 # -------------------------
 # Run the Application
 # -------------------------
 if __name__ == '__main__':
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':  # The reloader's serving process, not its watcher
+        start_past_stats()
     app.run_server(debug=True)
 
@@ -0,0 +1,259 @@
+"""Streaming event feed for live.py: a local replay server and a ring-buffer consumer.
+
+The replay server reads a stored match and emits its events as Server-Sent Events
+at wall-clock speed (or faster), so the live dashboard can be exercised end to end
+without an external data provider. ``LiveFeed`` consumes that stream into a bounded,
+append-only ring buffer and keeps running per-team totals as events arrive.
+
+Usage:
+    python live_feed.py --match-id 3869685 --speed 10 --port 8765
+    AI_COACH_FEED_URL=http://127.0.0.1:8765/events python live.py
+"""
+import argparse
+import json
+import math
+import threading
+import time
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Columns sent for each event; enough for positions, team stats and shot xG
+FEED_COLUMNS = [
+    'index', 'period', 'minute', 'second', 'type', 'team', 'possession_team', 'player', 'player_id',
+    'pass_recipient_id', 'pass_outcome', 'shot_outcome', 'x', 'y', 'end_x', 'end_y', 'under_pressure',
+    'shot_body_part', 'shot_type', 'shot_technique', 'shot_key_pass_id', 'shot_freeze_frame',
+]
+
+
+def _clean(value):
+    """JSON-safe scalar: NaN becomes None, numpy scalars become Python numbers."""
+    if value is None:
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def match_payloads(events):
+    """Chronological (clock seconds, event dict) pairs for a stored events frame.
+
+    Events are ordered by (period, index). StatsBomb minutes overlap across periods
+    (first-half stoppage runs past 45, the second half restarts at 45), so the clock
+    is ``timeline.match_clock``: seconds of play that only ever increase.
+    """
+    from timeline import match_clock
+
+    events = events.sort_values(['period', 'index'], kind='stable')
+    clocks = match_clock(events)
+    columns = [col for col in FEED_COLUMNS if col in events.columns]
+    rows = events[columns].astype(object).to_dict('records')
+    return [(int(clock), {col: _clean(value) for col, value in row.items()}) for clock, row in zip(clocks, rows)]
+
+
+def _display_seconds(event):
+    """The event's minute:second as shown on the match clock, in seconds."""
+    return (event.get('minute') or 0) * 60 + (event.get('second') or 0)
+
+
+# -------------------------
+# Replay server
+# -------------------------
+def make_handler(payloads, default_speed):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        """Streams ``payloads`` as text/event-stream on GET /events?speed=&from_minute=.
+
+        Each event's SSE id is its position in ``payloads``; a reconnecting client
+        sends the last one it received as ``Last-Event-ID`` and the stream resumes
+        after it instead of starting over.
+        """
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != '/events':
+                self.send_error(404)
+                return
+            query = parse_qs(url.query)
+            try:
+                speed = float(query.get('speed', [default_speed])[0])
+                from_clock = float(query.get('from_minute', [0])[0]) * 60
+                last_id = self.headers.get('Last-Event-ID')
+                last_id = int(last_id) if last_id else None
+            except ValueError:
+                self.send_error(400, "speed and from_minute must be numbers, Last-Event-ID an event id")
+                return
+            if not (math.isfinite(speed) and speed > 0) or not math.isfinite(from_clock):
+                self.send_error(400, "speed must be a positive number and from_minute finite")
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+
+            # Everything after the last event the client saw, or from the first event at or after
+            # from_minute on the match clock, in order
+            if last_id is not None:
+                start = max(last_id + 1, 0)
+            else:
+                start = next((i for i, (_, event) in enumerate(payloads) if _display_seconds(event) >= from_clock),
+                             len(payloads))
+            stream = payloads[start:]
+            start_wall = time.monotonic()
+            start_clock = stream[0][0] if stream else 0
+            try:
+                for seq, (clock, event) in enumerate(stream, start=start):
+                    delay = (clock - start_clock) / speed - (time.monotonic() - start_wall)
+                    if delay > 0:
+                        time.sleep(delay)
+                    event = dict(event, sent_at=time.time())  # For end-to-end latency on the consumer
+                    self.wfile.write(f"id: {seq}\ndata: {json.dumps(event)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"event: end\ndata: {}\n\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Consumer went away
+
+        def log_message(self, format, *args):
+            pass  # Keep the console quiet while streaming
+
+    return ReplayHandler
+
+
+def serve_replay(match_id, host='127.0.0.1', port=8765, speed=1.0):
+    """Serve a stored match as an SSE stream until interrupted."""
+    import match_store
+
+    payloads = match_payloads(match_store.load_events(match_id))
+    server = ThreadingHTTPServer((host, port), make_handler(payloads, speed))
+    print(f"Replaying match {match_id} ({len(payloads)} events) at {speed}x on http://{host}:{port}/events")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# -------------------------
+# Consumer
+# -------------------------
+class LiveFeed:
+    """Bounded, append-only ring buffer of live events with incremental team totals.
+
+    Every event gets a sequence number; readers keep the last number they saw and
+    ask for ``events_since(seq)``, so each event is processed once even though the
+    buffer only holds the most recent ``capacity`` events.
+    """
+
+    def __init__(self, url=None, capacity=5000, xg_fn=None):
+        self.url = url
+        self.buffer = deque(maxlen=capacity)
+        self.seq = 0
+        self.last_event_id = None  # SSE id of the last streamed event, sent back on reconnect
+        self.finished = False
+        self.team_stats = {}
+        self.latencies = deque(maxlen=500)
+        self._xg_fn = xg_fn
+        self._lock = threading.Lock()
+
+    def append(self, event):
+        """Add one event to the buffer and fold it into the team totals."""
+        with self._lock:
+            self.seq += 1
+            self.buffer.append((self.seq, event))
+            self._update_team_stats(event)
+            if event.get('sent_at'):
+                self.latencies.append(time.time() - event['sent_at'])
+            return self.seq
+
+    def events_since(self, seq):
+        """(seq, event) pairs newer than ``seq`` that are still in the buffer."""
+        with self._lock:
+            if not self.buffer or seq >= self.seq:
+                return []
+            oldest = self.buffer[0][0]
+            start = max(seq + 1 - oldest, 0)
+            return [self.buffer[i] for i in range(start, len(self.buffer))]
+
+    def _update_team_stats(self, event):
+        team = event.get('team')
+        if not team:
+            return
+        stats = self.team_stats.setdefault(
+            team, {'Events': 0, 'Passes': 0, 'Completed Passes': 0, 'Shots': 0, 'Goals': 0, 'xG': 0.0})
+        stats['Events'] += 1
+        if event.get('type') == 'Pass':
+            stats['Passes'] += 1
+            stats['Completed Passes'] += event.get('pass_outcome') is None
+        elif event.get('type') == 'Shot':
+            stats['Shots'] += 1
+            stats['Goals'] += event.get('shot_outcome') == 'Goal'
+            if self._xg_fn is not None and event.get('x') is not None:
+                stats['xG'] += float(self._xg_fn(event))
+
+    def snapshot(self):
+        """Copy of the per-team totals, safe to render while the feed keeps appending."""
+        with self._lock:
+            return {team: dict(stats) for team, stats in self.team_stats.items()}
+
+    def latency_ms(self):
+        """Median and 95th-percentile delivery latency (server send -> buffer append)."""
+        with self._lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        return 1000 * samples[len(samples) // 2], 1000 * samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def start(self):
+        """Consume ``self.url`` in a daemon thread, reconnecting if the server is not up yet."""
+        thread = threading.Thread(target=self._run, name='live-feed', daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self):
+        while not self.finished:
+            request = urllib.request.Request(self.url)
+            if self.last_event_id is not None:
+                request.add_header('Last-Event-ID', self.last_event_id)  # Resume, so no event is appended twice
+            try:
+                with urllib.request.urlopen(request) as response:
+                    self._read_stream(response)
+            except OSError as e:
+                print(f"Live feed unavailable ({e}); retrying in 2s")
+                time.sleep(2)
+
+    def _read_stream(self, response):
+        event_name, event_id, data = None, None, []
+        for raw_line in response:
+            line = raw_line.decode('utf-8').rstrip('\r\n')
+            if line.startswith('event:'):
+                event_name = line[6:].strip()
+            elif line.startswith('id:'):
+                event_id = line[3:].strip()
+            elif line.startswith('data:'):
+                data.append(line[5:].strip())
+            elif not line and data:  # Blank line ends an SSE message
+                if event_name == 'end':
+                    self.finished = True
+                    return
+                self.append(json.loads('\n'.join(data)))
+                if event_id is not None:
+                    self.last_event_id = event_id
+                event_name, event_id, data = None, None, []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a stored match as a live Server-Sent Events feed.")
+    parser.add_argument('--match-id', type=int, default=3869685)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--speed', type=float, default=1.0, help="Replay speed (1 = wall-clock)")
+    args = parser.parse_args(argv)
+    serve_replay(args.match_id, host=args.host, port=args.port, speed=args.speed)
+
+
+if __name__ == '__main__':
+    main()
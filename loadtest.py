@@ -0,0 +1,108 @@
+"""Load test for post.py's /insights route: throughput versus server worker count.
+
+For each worker count a fresh post.py server is started (threads, or forked
+processes) with an empty render cache, so every request really renders its two
+tactic plots. The test fires concurrent requests at distinct minutes and reports
+throughput and latency per worker count.
+
+Usage:
+    python loadtest.py --mode process --workers 1 2 4 --requests 12
+    python loadtest.py --mode thread --workers 1 4
+"""
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in the server subprocess: load everything up front, then serve with the requested concurrency
+SERVER = """
+import sys
+import post
+from werkzeug.serving import run_simple
+
+mode, workers, port, render_dir = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), sys.argv[4]
+post.RENDER_DIR = render_dir
+post.get_state()
+post._plotting()
+run_simple('127.0.0.1', port, post.app, threaded=mode == 'thread', processes=workers if mode == 'process' else 1)
+"""
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_up(url, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start within {timeout}s")
+
+
+def _fetch(url):
+    start = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=600) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def run(mode, workers, n_requests, windows=(3, 5, 10, 15)):
+    """Start a server with ``workers`` threads/processes and time ``n_requests`` uncached insight pages."""
+    port = _free_port()
+    render_dir = tempfile.mkdtemp(prefix='loadtest-renders-')
+    server = subprocess.Popen([sys.executable, '-c', SERVER, mode, str(workers), str(port), render_dir],
+                              cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f"http://127.0.0.1:{port}"
+        _wait_until_up(f"{base}/")
+        urls = [f"{base}/insights/{1 + (i * 7) % 120}?window={windows[i % len(windows)]}" for i in range(n_requests)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as clients:
+            latencies = sorted(clients.map(_fetch, urls))
+        wall = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(render_dir, ignore_errors=True)
+    return {
+        'workers': workers,
+        'wall': wall,
+        'throughput': n_requests / wall,
+        'p50': latencies[len(latencies) // 2],
+        'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure /insights throughput against server worker count.")
+    parser.add_argument('--mode', choices=['process', 'thread'], default='process')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--requests', type=int, default=12, help="Uncached insight pages per run (2 plots each)")
+    args = parser.parse_args(argv)
+
+    print(f"/insights load test: {args.requests} uncached pages per run, {args.mode} workers")
+    print(f"  {'workers':>7}{'wall s':>9}{'pages/s':>9}{'p50 s':>8}{'p95 s':>8}{'speed-up':>10}")
+    baseline = None
+    for workers in args.workers:
+        result = run(args.mode, workers, args.requests)
+        baseline = baseline or result['throughput']
+        print(f"  {workers:>7}{result['wall']:>9.1f}{result['throughput']:>9.2f}{result['p50']:>8.2f}"
+              f"{result['p95']:>8.2f}{result['throughput'] / baseline:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
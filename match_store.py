@@ -0,0 +1,509 @@
+"""Local on-disk match store shared by the dashboards.
+
+Each match is fetched once - from the StatsBomb API or from a local checkout of
+the StatsBomb open-data repository - and written as Parquet files under
+``data/store/<match_id>/``. The apps read those columnar files instead of
+calling ``sb.events`` at import time, so a restart costs a few milliseconds and
+works without network access.
+
+Usage:
+    python match_store.py fetch --match-id 3869685
+    python match_store.py ingest --competition-id 43 --season-id 106 --workers 8
+    python match_store.py bench --match-id 3869685
+    python match_store.py memory --match-id 3869685
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.environ.get('AI_COACH_STORE', os.path.join(BASE_DIR, 'data', 'store'))
+OPEN_DATA_DIR = os.environ.get('AI_COACH_OPEN_DATA')  # Local checkout of statsbomb/open-data
+OFFLINE = os.environ.get('AI_COACH_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+WORLD_CUP_FINAL = 3869685  # Argentina vs France, 2022 World Cup Final
+
+METADATA_KEY = b'ai_coach'
+SCHEMA_VERSION = 2  # Bump when ingest_events changes; older stored matches are re-ingested on load
+
+# End-location columns, in priority order, that feed the flat end_x/end_y columns
+END_LOCATION_COLUMNS = ['pass_end_location', 'carry_end_location', 'shot_end_location']
+
+# Low-cardinality string columns turned into categoricals by load_events(categorical=True),
+# together with every '*_outcome' column
+CATEGORICAL_COLUMNS = [
+    'type', 'team', 'possession_team', 'player', 'position', 'play_pattern',
+    'pass_recipient', 'pass_height', 'pass_type', 'pass_body_part', 'pass_technique',
+    'shot_type', 'shot_body_part', 'shot_technique', 'duel_type', 'substitution_replacement',
+    'goalkeeper_type', 'goalkeeper_position', 'goalkeeper_technique', 'goalkeeper_body_part',
+    'foul_committed_card', 'bad_behaviour_card', 'clearance_body_part',
+]
+
+# Shared dictionaries: one append-only category list per column, so a value gets the
+# same integer code in every match loaded by this process
+_CATEGORY_DICTIONARIES = {}
+_CATEGORY_LOCK = threading.Lock()
+
+
+class OfflineError(RuntimeError):
+    """Raised when a match is missing from the store and fetching is not allowed."""
+
+
+# -------------------------
+# Parquet read/write
+# -------------------------
+def match_dir(match_id):
+    """Return the store directory for a match."""
+    return os.path.join(STORE_DIR, str(int(match_id)))
+
+
+def _is_nested(series):
+    """True for object columns holding lists or dicts (locations, freeze frames, tactics...)."""
+    return series.dtype == object and series.map(lambda v: isinstance(v, (list, dict))).any()
+
+
+def write_table(path, df, meta=None):
+    """Write a DataFrame to Parquet, JSON-encoding nested columns so they round-trip exactly."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = df.copy()
+    nested = [col for col in df.columns if _is_nested(df[col])]
+    for col in nested:
+        df[col] = [json.dumps(v) if isinstance(v, (list, dict)) else None for v in df[col]]
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[METADATA_KEY] = json.dumps({**(meta or {}), 'nested': nested}).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)  # Atomic, so readers never see a half-written file
+
+
+def read_table_meta(path):
+    """Return the metadata written alongside a table, without reading its rows."""
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(path).metadata or {}
+    return json.loads(metadata.get(METADATA_KEY, b'{}'))
+
+
+def read_table(path, columns=None):
+    """Read a table written by ``write_table``, decoding nested columns back into lists/dicts."""
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path, columns=columns)
+    meta = json.loads((table.schema.metadata or {}).get(METADATA_KEY, b'{}'))
+    df = table.to_pandas()
+    for col in meta.get('nested', []):
+        if col in df.columns:
+            df[col] = pd.Series([json.loads(v) if isinstance(v, str) else np.nan for v in df[col]],
+                                index=df.index, dtype=object)
+    return df
+
+
+# -------------------------
+# Fetching (StatsBomb API or local open-data JSON)
+# -------------------------
+def _open_data_path(*parts):
+    """Path inside the local open-data checkout (accepts the repo root or its data/ folder)."""
+    root = OPEN_DATA_DIR
+    if os.path.isdir(os.path.join(root, 'data')):
+        root = os.path.join(root, 'data')
+    return os.path.join(root, *parts)
+
+
+def _check_online(what, offline):
+    if offline:
+        raise OfflineError(
+            f"{what} is not in the match store at {STORE_DIR} and offline mode is on. "
+            f"Set AI_COACH_OPEN_DATA to a local open-data checkout or run "
+            f"'python match_store.py fetch' while online."
+        )
+
+
+def _events_frame(raw_events, match_id):
+    """Flatten raw open-data events exactly the way ``sb.events`` does."""
+    from statsbombpy import entities, helpers
+
+    grouped = helpers.filter_and_group_events(entities.events(raw_events, match_id), {}, 'dataframe', True)
+    frames = [pd.DataFrame(evs) for evs in grouped.values()]
+    return pd.concat(frames, axis=0, ignore_index=True, sort=True)
+
+
+def _matches_frame(raw_matches):
+    """Flatten raw open-data matches into the columns the apps use from ``sb.matches``."""
+    matches = pd.json_normalize(raw_matches, sep='_')
+    return matches.rename(columns={
+        'home_team_home_team_name': 'home_team',
+        'away_team_away_team_name': 'away_team',
+        'competition_competition_name': 'competition',
+        'season_season_name': 'season',
+        'competition_stage_name': 'competition_stage',
+        'stadium_name': 'stadium',
+        'referee_name': 'referee',
+    })
+
+
+def fetch_events(match_id, offline=None):
+    """Fetch a match's events without touching the store (the path every app used to take)."""
+    if OPEN_DATA_DIR:
+        with open(_open_data_path('events', f"{int(match_id)}.json"), encoding='utf-8') as f:
+            return _events_frame(json.load(f), int(match_id))
+    _check_online(f"Match {match_id}", OFFLINE if offline is None else offline)
+    from statsbombpy import sb
+    return sb.events(match_id=match_id)
+
+
+def fetch_lineups(match_id, offline=None):
+    """Fetch a match's lineups as ``{team_name: DataFrame}``, like ``sb.lineups``."""
+    if OPEN_DATA_DIR:
+        with open(_open_data_path('lineups', f"{int(match_id)}.json"), encoding='utf-8') as f:
+            raw = json.load(f)
+        lineups = {}
+        for lineup in raw:
+            lineup_df = pd.DataFrame(lineup['lineup'])
+            lineup_df['country'] = lineup_df['country'].apply(
+                lambda c: c['name'] if isinstance(c, dict) else 'Unknown')
+            lineups[lineup['team_name']] = lineup_df
+        return lineups
+    _check_online(f"Lineups for match {match_id}", OFFLINE if offline is None else offline)
+    from statsbombpy import sb
+    return sb.lineups(match_id=match_id)
+
+
+def fetch_matches(competition_id, season_id, offline=None):
+    """Fetch the match list of a competition season."""
+    if OPEN_DATA_DIR:
+        with open(_open_data_path('matches', str(competition_id), f"{season_id}.json"), encoding='utf-8') as f:
+            return _matches_frame(json.load(f))
+    _check_online(f"Matches for competition {competition_id}/{season_id}", OFFLINE if offline is None else offline)
+    from statsbombpy import sb
+    return sb.matches(competition_id=competition_id, season_id=season_id)
+
+
+# -------------------------
+# Ingestion
+# -------------------------
+def split_coords(series):
+    """Split a column of [x, y(, z)] lists into two float32 arrays, NaN where there is no location."""
+    coords = np.full((len(series), 2), np.nan, dtype=np.float32)
+    valid = np.fromiter((isinstance(v, (list, tuple)) and len(v) >= 2 for v in series),
+                        dtype=bool, count=len(series))
+    if valid.any():
+        coords[valid] = np.array([v[:2] for v in series[valid]], dtype=np.float32)
+    return coords[:, 0], coords[:, 1]
+
+
+def ingest_events(events):
+    """Normalise a raw events frame before it is written to the store.
+
+    Rows are put in chronological order and the location lists are flattened once
+    into contiguous float32 columns: ``x``/``y`` from ``location`` and ``end_x``/``end_y``
+    from whichever of the pass, carry or shot end locations the event has.
+    """
+    if 'index' in events.columns:
+        events = events.sort_values('index', kind='stable')  # Chronological order
+    events = events.reset_index(drop=True)
+
+    if 'location' in events.columns:
+        events['x'], events['y'] = split_coords(events['location'])
+    else:
+        events['x'] = events['y'] = np.float32(np.nan)
+
+    end_x = np.full(len(events), np.nan, dtype=np.float32)
+    end_y = np.full(len(events), np.nan, dtype=np.float32)
+    for col in END_LOCATION_COLUMNS:
+        if col in events.columns:
+            col_x, col_y = split_coords(events[col])
+            missing = np.isnan(end_x)
+            end_x[missing], end_y[missing] = col_x[missing], col_y[missing]
+    events['end_x'], events['end_y'] = end_x, end_y
+    return events
+
+
+def store_match(match_id, offline=None, with_lineups=True):
+    """Fetch a match and write it to the store.
+
+    events.parquet is written last, so its presence marks a complete partition
+    and an interrupted bulk ingest can resume from it.
+    """
+    events = ingest_events(fetch_events(match_id, offline=offline))
+    if with_lineups:
+        lineups = fetch_lineups(match_id, offline=offline)
+        frames = [df.assign(team_name=team) for team, df in lineups.items()]
+        write_table(os.path.join(match_dir(match_id), 'lineups.parquet'), pd.concat(frames, ignore_index=True))
+    write_table(os.path.join(match_dir(match_id), 'events.parquet'), events,
+                {'match_id': int(match_id), 'schema': SCHEMA_VERSION})
+    return events
+
+
+def _ingest_worker(match_id):
+    """Process-pool task: store one match and report (match_id, event count, error)."""
+    try:
+        return match_id, len(store_match(match_id)), None
+    except Exception as e:
+        return match_id, 0, f"{type(e).__name__}: {e}"
+
+
+def ingest_competition(competition_id, season_id, workers=None, refresh=False):
+    """Store every match of a competition season in parallel, one partition per match.
+
+    Matches already in the store are skipped unless ``refresh`` is set, so
+    re-running after an interruption resumes where the last run stopped.
+    Returns the list of match ids that failed.
+    """
+    matches = load_matches(competition_id, season_id, refresh=refresh)
+    match_ids = [int(m) for m in matches['match_id']]
+    todo = [m for m in match_ids if refresh or not has_match(m)]
+    print(f"Competition {competition_id}/{season_id}: {len(match_ids)} matches, "
+          f"{len(match_ids) - len(todo)} already stored, {len(todo)} to ingest")
+
+    failed = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_ingest_worker, match_id) for match_id in todo]
+        for done, future in enumerate(as_completed(futures), start=1):
+            match_id, n_events, error = future.result()
+            if error:
+                failed.append(match_id)
+                print(f"  [{done}/{len(todo)}] match {match_id} failed: {error}")
+            else:
+                print(f"  [{done}/{len(todo)}] match {match_id}: {n_events} events")
+    print(f"Ingested {len(todo) - len(failed)} matches in {time.perf_counter() - start:.1f}s"
+          + (f", {len(failed)} failed (re-run to retry)" if failed else ""))
+    return failed
+
+
+# -------------------------
+# Loading
+# -------------------------
+def has_match(match_id):
+    """True if the match's events are already in the store."""
+    return os.path.exists(os.path.join(match_dir(match_id), 'events.parquet'))
+
+
+def has_matches(competition_id, season_id):
+    """True if the match list of a competition season is already in the store."""
+    return os.path.exists(os.path.join(STORE_DIR, 'matches', f"{competition_id}_{season_id}.parquet"))
+
+
+def data_version(match_id):
+    """Token that changes whenever a match's stored events are rewritten (None if it is not stored).
+
+    Caches of anything derived from the events include it in their keys.
+    """
+    try:
+        stat = os.stat(os.path.join(match_dir(match_id), 'events.parquet'))
+    except OSError:
+        return None
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def stored_match_ids():
+    """Ids of every complete match partition in the store."""
+    if not os.path.isdir(STORE_DIR):
+        return []
+    return sorted(int(name) for name in os.listdir(STORE_DIR) if name.isdigit() and has_match(name))
+
+
+def _categorical_candidates(events):
+    return [col for col in events.columns
+            if (col in CATEGORICAL_COLUMNS or col.endswith('_outcome'))
+            and not isinstance(events[col].dtype, pd.CategoricalDtype)
+            and (events[col].dtype == object or pd.api.types.is_string_dtype(events[col]))
+            and not _is_nested(events[col])]
+
+
+def encode_categoricals(events):
+    """Return a copy of ``events`` with its string columns stored as shared-dictionary categoricals.
+
+    Dictionaries only ever grow, so frames encoded earlier keep valid codes; call this
+    again on an older frame to bring its categories up to date before concatenating.
+    """
+    events = events.copy()
+    for col in _categorical_candidates(events) + [c for c in events.columns
+                                                   if isinstance(events[c].dtype, pd.CategoricalDtype)]:
+        values = events[col].astype(object)
+        with _CATEGORY_LOCK:
+            dictionary = _CATEGORY_DICTIONARIES.get(col, pd.Index([], dtype=object))
+            new_values = pd.Index(values.dropna().unique(), dtype=object).difference(dictionary)
+            if len(new_values):
+                dictionary = dictionary.append(new_values)
+                _CATEGORY_DICTIONARIES[col] = dictionary
+        events[col] = pd.Categorical(values, categories=dictionary)
+    return events
+
+
+def category_code(col, value):
+    """Integer code of ``value`` in the shared dictionary of ``col`` (-1 if never seen)."""
+    dictionary = _CATEGORY_DICTIONARIES.get(col)
+    if dictionary is None or value not in dictionary:
+        return -1
+    return int(dictionary.get_loc(value))
+
+
+def memory_report(before, after):
+    """Print per-column memory of a frame before and after encoding."""
+    before_bytes = before.memory_usage(deep=True, index=False)
+    after_bytes = after.memory_usage(deep=True, index=False)
+    print(f"{'Column':<28}{'dtype':>10}{'before (KB)':>14}{'after (KB)':>13}{'ratio':>8}")
+    changed = [col for col in after.columns if str(before[col].dtype) != str(after[col].dtype)]
+    for col in sorted(changed, key=lambda c: after_bytes[c] - before_bytes[c]):
+        ratio = before_bytes[col] / max(after_bytes[col], 1)
+        print(f"{col:<28}{str(after[col].dtype):>10}{before_bytes[col] / 1024:>14.1f}"
+              f"{after_bytes[col] / 1024:>13.1f}{ratio:>7.1f}x")
+    total_before, total_after = before_bytes.sum(), after_bytes.sum()
+    print(f"{'Total (all columns)':<28}{'':>10}{total_before / 1024:>14.1f}{total_after / 1024:>13.1f}"
+          f"{total_before / max(total_after, 1):>7.1f}x")
+
+
+def load_events(match_id=WORLD_CUP_FINAL, columns=None, offline=None, refresh=False,
+                categorical=False, report=False):
+    """Load a match's events from the store, fetching and storing them on first use.
+
+    With ``categorical=True`` the type/team/player/outcome columns come back as
+    categoricals sharing one dictionary per column; ``report=True`` also prints
+    their memory use before and after encoding.
+    """
+    path = os.path.join(match_dir(match_id), 'events.parquet')
+    if refresh or not os.path.exists(path):
+        store_match(match_id, offline=offline)
+    elif read_table_meta(path).get('schema') != SCHEMA_VERSION:
+        # Stored by an older ingestion stage: re-ingest from the stored rows, no fetch needed
+        write_table(path, ingest_events(read_table(path)), {'match_id': int(match_id), 'schema': SCHEMA_VERSION})
+    events = read_table(path, columns=columns)
+    if not categorical:
+        return events
+    encoded = encode_categoricals(events)
+    if report:
+        memory_report(events, encoded)
+    return encoded
+
+
+def load_season_events(competition_id, season_id, columns=None, categorical=False):
+    """Load the stored events of every match of a competition season into one frame."""
+    matches = load_matches(competition_id, season_id)
+    match_ids = [int(m) for m in matches['match_id'] if has_match(m)]
+    if not match_ids:
+        return pd.DataFrame(columns=columns)
+    events = pd.concat([load_events(m, columns=columns) for m in match_ids], ignore_index=True)
+    return encode_categoricals(events) if categorical else events
+
+
+def load_lineups(match_id=WORLD_CUP_FINAL, offline=None, refresh=False):
+    """Load a match's lineups from the store as ``{team_name: DataFrame}``."""
+    path = os.path.join(match_dir(match_id), 'lineups.parquet')
+    if refresh or not os.path.exists(path):
+        lineups = fetch_lineups(match_id, offline=offline)
+        frames = [df.assign(team_name=team) for team, df in lineups.items()]
+        write_table(path, pd.concat(frames, ignore_index=True))
+    lineups = read_table(path)
+    return {team: df.drop(columns='team_name').reset_index(drop=True)
+            for team, df in lineups.groupby('team_name', sort=False)}
+
+
+def load_matches(competition_id, season_id, offline=None, refresh=False):
+    """Load the match list of a competition season from the store."""
+    path = os.path.join(STORE_DIR, 'matches', f"{competition_id}_{season_id}.parquet")
+    if refresh or not os.path.exists(path):
+        write_table(path, fetch_matches(competition_id, season_id, offline=offline))
+    return read_table(path)
+
+
+# -------------------------
+# Cold-start benchmark
+# -------------------------
+def _time_cold_start(code, repeat):
+    """Wall time of running ``code`` in fresh interpreters, so imports and parsing are included."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench(match_id, repeat=3):
+    """Compare a cold start through the store against fetching the match directly."""
+    if not has_match(match_id):
+        store_match(match_id)
+
+    legacy = _time_cold_start(f"import match_store; match_store.fetch_events({match_id})", repeat)
+    stored = _time_cold_start(f"import match_store; match_store.load_events({match_id})", repeat)
+
+    start = time.perf_counter()
+    events = load_events(match_id)
+    read_time = time.perf_counter() - start
+
+    source = f"open-data JSON in {OPEN_DATA_DIR}" if OPEN_DATA_DIR else "StatsBomb API"
+    print(f"Match {match_id}: {len(events)} events, {events.shape[1]} columns (direct fetch from {source})")
+    print(f"  {'Path':<28}{'best (s)':>10}{'median (s)':>12}")
+    print(f"  {'direct fetch':<28}{min(legacy):>10.3f}{float(np.median(legacy)):>12.3f}")
+    print(f"  {'match store (Parquet)':<28}{min(stored):>10.3f}{float(np.median(stored)):>12.3f}")
+    print(f"  In-process store read: {read_time * 1000:.1f} ms")
+    print(f"  Speed-up (best cold start): {min(legacy) / min(stored):.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local StatsBomb match store.")
+    parser.add_argument('--offline', action='store_true', help="Never call the StatsBomb API")
+    parser.add_argument('--open-data', help="Local checkout of statsbomb/open-data to read JSON from")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    fetch = sub.add_parser('fetch', help="Fetch matches into the store")
+    fetch.add_argument('--match-id', type=int, nargs='+', default=[WORLD_CUP_FINAL])
+    fetch.add_argument('--refresh', action='store_true', help="Re-fetch matches already in the store")
+
+    ingest = sub.add_parser('ingest', help="Ingest every match of a competition season in parallel")
+    ingest.add_argument('--competition-id', type=int, default=43)
+    ingest.add_argument('--season-id', type=int, default=106)
+    ingest.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    ingest.add_argument('--refresh', action='store_true', help="Re-ingest matches already in the store")
+
+    bench_cmd = sub.add_parser('bench', help="Cold-start benchmark: store vs direct fetch")
+    bench_cmd.add_argument('--match-id', type=int, default=WORLD_CUP_FINAL)
+    bench_cmd.add_argument('--repeat', type=int, default=3)
+
+    memory = sub.add_parser('memory', help="Per-column memory report of the categorical encoding")
+    memory.add_argument('--match-id', type=int, default=WORLD_CUP_FINAL)
+
+    args = parser.parse_args(argv)
+    # Exported so the subprocesses started by the benchmark see the same settings
+    if args.offline:
+        os.environ['AI_COACH_OFFLINE'] = '1'
+    if args.open_data:
+        os.environ['AI_COACH_OPEN_DATA'] = args.open_data
+    global OFFLINE, OPEN_DATA_DIR
+    OFFLINE = OFFLINE or args.offline
+    OPEN_DATA_DIR = args.open_data or OPEN_DATA_DIR
+
+    if args.command == 'fetch':
+        for match_id in args.match_id:
+            if has_match(match_id) and not args.refresh:
+                print(f"Match {match_id} already in store")
+                continue
+            events = store_match(match_id)
+            print(f"Stored match {match_id}: {len(events)} events -> {match_dir(match_id)}")
+    elif args.command == 'ingest':
+        failed = ingest_competition(args.competition_id, args.season_id, workers=args.workers, refresh=args.refresh)
+        sys.exit(1 if failed else 0)
+    elif args.command == 'bench':
+        bench(args.match_id, repeat=args.repeat)
+    elif args.command == 'memory':
+        load_events(args.match_id, categorical=True, report=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Team pass networks from an events frame, one match or a whole season.
+
+Completed passes are counted passer -> recipient in one step: both names are
+mapped to integer player codes and the (passer, recipient) pairs become a
+sparse COO matrix whose duplicate entries sum into the pass counts. Each
+player's node sits at the average location of their on-ball events and is
+sized by passes made plus received. Drawing is one ``LineCollection`` for the
+edges and one scatter for the nodes, so its cost depends on the number of
+players, not passes.
+
+    network = build_network(events, 'Argentina', minutes=(0, 90), until_substitution=True)
+    draw_network(ax, network, min_passes=3)
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from timeline import match_clock
+
+# The only columns the network reads; taking just these keeps a season-sized frame cheap to filter
+COLUMNS = ['match_id', 'period', 'minute', 'second', 'type', 'player', 'pass_recipient', 'pass_outcome', 'x', 'y']
+
+
+def _clock(events):
+    """Chronological order of each event within its match.
+
+    StatsBomb minutes restart at 45, 90 and 105 in the later periods, so first-half
+    stoppage time (45:xx of period 1) would otherwise tie with or follow the start
+    of the second half; ``timeline.match_clock`` runs the periods on one after another.
+    """
+    if 'period' not in events.columns:
+        return events['minute'].to_numpy(dtype=float) * 60 + events['second'].fillna(0).to_numpy(dtype=float)
+    return match_clock(events.assign(second=events['second'].fillna(0)))
+
+
+def _codes(series, players):
+    """Position of each value in ``players`` (-1 if absent), recoding categoricals without materialising strings."""
+    return series.astype('category').cat.set_categories(players).cat.codes.to_numpy()
+
+
+def build_network(events, team, minutes=None, until_substitution=False):
+    """Nodes and passer -> recipient counts of ``team``'s completed passes.
+
+    ``minutes`` is an inclusive (first, last) minute range; ``until_substitution``
+    keeps only the events before the team's first substitution (per match, when
+    ``events`` holds several). Returns a dict with the ``players``, their mean
+    ``x``/``y``, ``volume`` (completed passes made + received) and the ``adjacency``
+    CSR matrix (row passer, column recipient).
+    """
+    columns = events.columns.get_indexer([col for col in COLUMNS if col in events.columns])
+    team_events = events.iloc[np.flatnonzero((events['team'] == team).to_numpy()), columns]
+    clock = _clock(team_events)
+    keep = np.ones(len(team_events), dtype=bool)
+    if minutes is not None:
+        first, last = minutes
+        keep &= (team_events['minute'].to_numpy() >= first) & (team_events['minute'].to_numpy() <= last)
+    if until_substitution:
+        match = team_events['match_id'] if 'match_id' in team_events.columns else pd.Series(0, index=team_events.index)
+        sub_clock = pd.Series(np.where((team_events['type'] == 'Substitution').to_numpy(), clock, np.nan),
+                              index=team_events.index)
+        first_sub = sub_clock.groupby(match.to_numpy()).transform('min').to_numpy()
+        keep &= ~(clock >= first_sub)  # NaN (no substitution) keeps everything
+    team_events = team_events[keep]
+
+    located = team_events[team_events['player'].notna().to_numpy() & team_events['x'].notna().to_numpy()]
+    nodes = located.groupby('player', observed=True).agg(x=('x', 'mean'), y=('y', 'mean'))
+    players = nodes.index.astype(str).tolist()
+
+    completed = team_events[((team_events['type'] == 'Pass') & team_events['pass_outcome'].isna()
+                             & team_events['pass_recipient'].notna()).to_numpy()]
+    passer = _codes(completed['player'], players)
+    recipient = _codes(completed['pass_recipient'], players)
+    known = (passer >= 0) & (recipient >= 0)  # Both ends need a node to draw the edge between
+    n = len(players)
+    adjacency = sparse.coo_matrix((np.ones(known.sum(), dtype=np.int64), (passer[known], recipient[known])),
+                                  shape=(n, n)).tocsr()  # Duplicate (passer, recipient) entries are summed
+    volume = np.asarray(adjacency.sum(axis=1)).ravel() + np.asarray(adjacency.sum(axis=0)).ravel()
+    return {'team': team, 'players': players, 'x': nodes['x'].to_numpy(), 'y': nodes['y'].to_numpy(),
+            'volume': volume, 'adjacency': adjacency}
+
+
+def edges(network, min_passes=1):
+    """(i, j, count) arrays of player pairs with at least ``min_passes`` completed passes, either direction."""
+    both_ways = network['adjacency'] + network['adjacency'].T
+    pairs = sparse.triu(both_ways, k=1).tocoo()
+    strong = pairs.data >= min_passes
+    return pairs.row[strong], pairs.col[strong], pairs.data[strong]
+
+
+def short_name(player):
+    """Last name, for node labels."""
+    return player.split()[-1] if player else player
+
+
+def draw_network(ax, network, min_passes=2, color='#00d4ff', highlight=None, zorder=2):
+    """Draw the network on a pitch axis: one ``LineCollection`` of edges, one scatter of nodes, then labels."""
+    from matplotlib.collections import LineCollection
+    from matplotlib.colors import to_rgba
+
+    x, y, volume = network['x'], network['y'], network['volume']
+    if not len(x):
+        return
+    i, j, count = edges(network, min_passes)
+    if len(count):
+        weight = count / count.max()
+        segments = np.stack([np.column_stack([x[i], y[i]]), np.column_stack([x[j], y[j]])], axis=1)
+        rgba = np.tile(np.array(to_rgba(color)), (len(count), 1))
+        rgba[:, 3] = 0.2 + 0.7 * weight
+        ax.add_collection(LineCollection(segments, linewidths=1 + 7 * weight, colors=rgba,
+                                         capstyle='round', zorder=zorder))
+    sizes = 100 + 900 * volume / max(volume.max(), 1)
+    colors = [('#ffd166' if player == highlight else color) for player in network['players']]
+    ax.scatter(x, y, s=sizes, c=colors, edgecolors='white', linewidths=1.5, zorder=zorder + 1)
+    for player, px, py in zip(network['players'], x, y):
+        ax.text(px, py - 3.5, short_name(player), color='white', fontsize=8, ha='center', va='bottom',
+                zorder=zorder + 2)
@@ -0,0 +1,103 @@
+"""Reusable pitch figures.
+
+Building an ``mplsoccer`` pitch lays out the same lines, arcs and (for
+``pitch_color='grass'``) a fresh 1000x1000 noise texture on every render. Here a
+figure with the pitch already drawn is pooled per style and figure geometry, and
+each render gets one back with only the artists the previous render added
+removed: titles, data layers, extra axes. Matplotlib figures are not
+thread-safe, so a render checks a template out of the pool (building one if
+all are in use) and releases it once the figure is saved; the pool is shared
+by every thread, as the threaded servers start a new thread per request. The
+``Pitch`` itself is shared, for its ``arrows``, ``scatter`` and ``lines`` helpers.
+
+    fig, ax, pitch = pitch_cache.pitch_figure(STYLE, figsize=(10, 7), layout='constrained')
+    ...
+    fig.savefig(path)
+    pitch_cache.release(fig)
+"""
+import threading
+from functools import lru_cache
+
+_pool = {}  # (style, figsize, rect, layout) -> idle templates
+_checked_out = {}  # id(figure) -> its template, until released
+_pool_lock = threading.Lock()
+
+
+def _style_key(style):
+    return tuple(sorted(style.items()))
+
+
+@lru_cache(maxsize=16)
+def _pitch(style_key):
+    from mplsoccer import Pitch
+
+    return Pitch(**dict(style_key))
+
+
+def get_pitch(**style):
+    """The shared ``Pitch`` for a style (treat it as read-only)."""
+    return _pitch(_style_key(style))
+
+
+class PitchTemplate:
+    """A figure with the pitch drawn once, reset to that state before each reuse."""
+
+    def __init__(self, style_key, figsize, rect=None, layout=None):
+        from matplotlib.figure import Figure
+
+        self.key = (style_key, figsize, rect, layout)
+        self.pitch = _pitch(style_key)
+        self.fig = Figure(figsize=figsize, layout=layout)
+        self.ax = self.fig.add_axes(rect) if rect else self.fig.add_subplot()
+        self.pitch.draw(ax=self.ax)
+        self._fig_artists = set(self.fig.get_children())
+        self._ax_artists = set(self.ax.get_children())
+        self._facecolor = self.fig.get_facecolor()
+        self._ax_facecolor = self.ax.patch.get_facecolor()
+        self._aspect = self.ax.get_aspect()  # Changed by imshow(aspect='auto'), e.g. in density.draw_density
+        self._adjustable = self.ax.get_adjustable()
+
+    def reset(self):
+        """Remove everything added since the pitch was drawn and restore its limits, aspect, colours and titles."""
+        for artist in self.ax.get_children():
+            if artist not in self._ax_artists:
+                artist.remove()
+        for artist in self.fig.get_children():
+            if artist not in self._fig_artists:
+                artist.remove()  # Extra axes, figure texts and images
+        for loc in ('left', 'center', 'right'):
+            self.ax.set_title('', loc=loc)
+        x0, x1, y0, y1 = self.pitch.extent
+        self.ax.set_xlim(x0, x1)
+        self.ax.set_ylim(y0, y1)
+        self.ax.set_aspect(self._aspect, adjustable=self._adjustable)
+        self.ax.patch.set_facecolor(self._ax_facecolor)
+        self.fig.set_facecolor(self._facecolor)
+
+
+def pitch_figure(style, figsize, rect=None, layout=None):
+    """(figure, pitch axes, ``Pitch``) ready to draw on, checked out of the pool for the arguments.
+
+    ``rect`` places the pitch axes with ``fig.add_axes``; otherwise it is a single
+    subplot. The figure is the caller's alone until it is passed to ``release``;
+    one never released (say, after an exception) is simply not reused.
+    """
+    key = (_style_key(style), tuple(figsize), tuple(rect) if rect else None, layout)
+    with _pool_lock:
+        idle = _pool.get(key)
+        template = idle.pop() if idle else None
+    if template is None:
+        template = PitchTemplate(*key)
+    else:
+        template.reset()
+    with _pool_lock:
+        _checked_out[id(template.fig)] = template
+    return template.fig, template.ax, template.pitch
+
+
+def release(fig):
+    """Return a figure from ``pitch_figure`` to the pool once it is saved; other figures are ignored."""
+    with _pool_lock:
+        template = _checked_out.pop(id(fig), None)
+        if template is not None:
+            _pool.setdefault(template.key, []).append(template)
@@ -0,0 +1,231 @@
+"""Per-player match statistics derived from the stored events.
+
+One grouped aggregation per match turns its events into a row per player:
+touches, passes attempted/completed, shots, goals, key passes, assists, xG
+(from the shared model), xA (the xG of the shots a player's passes set up) and
+defensive actions. Each match's table is cached next to its events as
+``player_stats.parquet`` and recomputed only when the events, the xG model or
+this module's definitions change, so a season costs one pass per new match.
+Lookups go through an in-memory ``{player: stats}`` index per match.
+
+Usage:
+    python player_stats.py build --competition-id 43 --season-id 106 --workers 8
+    python player_stats.py show --match-id 3869685
+"""
+import argparse
+import os
+import threading
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import match_store
+import xg_model
+
+STATS_VERSION = 1  # Bump when the definitions below change; cached tables are then rebuilt
+
+STAT_COLUMNS = ['touches', 'passes_attempted', 'passes_completed', 'shots', 'goals', 'key_passes',
+                'assists', 'xG', 'xA', 'defensive_actions']
+
+# Event types where the player has the ball at their feet
+TOUCH_TYPES = ['Pass', 'Ball Receipt*', 'Carry', 'Shot', 'Dribble', 'Ball Recovery', 'Clearance',
+               'Interception', 'Block', 'Miscontrol', 'Dispossessed', 'Goal Keeper', 'Foul Won', 'Duel']
+# Defensive actions: these types plus tackles (Duel events of duel_type Tackle)
+DEFENSIVE_TYPES = ['Interception', 'Block', 'Clearance']
+
+_indexes = {}  # match_id -> (cache token, {player: stats})
+_indexes_lock = threading.Lock()
+
+
+def _column(events, name):
+    return events[name] if name in events.columns else pd.Series(np.nan, index=events.index, dtype=object)
+
+
+def compute(events, shot_xg):
+    """Stats table (one row per player) of one match's events; ``shot_xg`` maps shot id -> xG."""
+    event_type = events['type'].astype(object).to_numpy()
+    is_pass = event_type == 'Pass'
+    is_shot = event_type == 'Shot'
+    shot_xg = pd.Series(shot_xg, dtype=np.float64)
+    xg = np.where(is_shot, events['id'].map(shot_xg).to_numpy(dtype=np.float64), 0.0)
+
+    # Key passes, assists and xA are credited through the shots' key pass ids
+    shots = events[is_shot]
+    key_pass_id = _column(shots, 'shot_key_pass_id')
+    set_up = pd.DataFrame({'xA': xg[is_shot], 'assist': (_column(shots, 'shot_outcome') == 'Goal').to_numpy()},
+                          index=key_pass_id.to_numpy()).loc[key_pass_id.notna().to_numpy()]
+    set_up = set_up.groupby(level=0).sum()
+    pass_ids = events['id'].where(is_pass)
+
+    flags = pd.DataFrame({
+        'player': events['player'].astype(object),
+        'team': events['team'].astype(object),
+        'touches': np.isin(event_type, TOUCH_TYPES) & events['x'].notna().to_numpy(),
+        'passes_attempted': is_pass,
+        'passes_completed': is_pass & _column(events, 'pass_outcome').isna().to_numpy(),
+        'shots': is_shot,
+        'goals': is_shot & (_column(events, 'shot_outcome') == 'Goal').to_numpy(),
+        'key_passes': pass_ids.isin(set_up.index).to_numpy(),
+        'assists': pass_ids.map(set_up['assist']).fillna(0).to_numpy(dtype=np.float64) > 0,
+        'xG': xg,
+        'xA': pass_ids.map(set_up['xA']).fillna(0).to_numpy(dtype=np.float64),
+        'defensive_actions': (np.isin(event_type, DEFENSIVE_TYPES)
+                              | ((event_type == 'Duel') & (_column(events, 'duel_type') == 'Tackle').to_numpy())),
+    })
+    flags = flags[flags['player'].notna()]
+    table = flags.groupby(['player', 'team'], sort=True).sum().reset_index()
+    counts = [col for col in STAT_COLUMNS if col not in ('xG', 'xA')]
+    table[counts] = table[counts].astype(np.int64)
+    return table
+
+
+def match_table(match_id):
+    """A match's stats table, cached in the store alongside its events."""
+    model = xg_model.get_model()
+    path = os.path.join(match_store.match_dir(match_id), 'player_stats.parquet')
+    expected = {'match_id': int(match_id), 'stats_version': STATS_VERSION, 'model_version': model['version'],
+                'data_version': match_store.data_version(match_id)}
+    if os.path.exists(path) and expected['data_version'] is not None:
+        meta = match_store.read_table_meta(path)
+        if all(meta.get(key) == value for key, value in expected.items()):
+            return match_store.read_table(path)
+
+    events = match_store.load_events(match_id)
+    shots = xg_model.load_shots(match_id)
+    table = compute(events, dict(zip(shots['id'], shots['xG'])))
+    expected['data_version'] = match_store.data_version(match_id)  # The events may have been (re)stored above
+    match_store.write_table(path, table, expected)
+    return table
+
+
+def version(match_id):
+    """Changes whenever ``match_table`` would rebuild, so indexes built from an old table are not reused."""
+    return STATS_VERSION, xg_model.model_version(), match_store.data_version(match_id)
+
+
+def player_index(match_id):
+    """``{player: stats dict}`` of a match, kept in memory until its events or the xG model change."""
+    token = version(match_id)
+    with _indexes_lock:
+        cached = _indexes.get(match_id)
+        if cached and cached[0] == token:
+            return cached[1]
+    table = match_table(match_id)
+    index = {row['player']: row for row in table.to_dict('records')}
+    with _indexes_lock:
+        _indexes[match_id] = (token, index)
+    return index
+
+
+def get(match_id, player):
+    """One player's stats in a match (None if they did not feature)."""
+    return player_index(match_id).get(player)
+
+
+def load(match_ids):
+    """Stats of several matches in one frame indexed by (match_id, player)."""
+    frames = [match_table(m).assign(match_id=int(m)) for m in match_ids]
+    if not frames:
+        return pd.DataFrame(columns=['match_id', 'player', 'team'] + STAT_COLUMNS).set_index(['match_id', 'player'])
+    return pd.concat(frames, ignore_index=True).set_index(['match_id', 'player']).sort_index()
+
+
+def totals(match_ids):
+    """``{player: stats}`` summed over matches, with the number of ``matches`` each player featured in."""
+    table = load(match_ids).reset_index()
+    if table.empty:
+        return {}
+    summed = table.groupby('player')[STAT_COLUMNS].sum()
+    summed['matches'] = table.groupby('player')['match_id'].nunique()
+    summed['team'] = table.groupby('player')['team'].last()
+    return {player: row for player, row in zip(summed.index, summed.to_dict('records'))}
+
+
+def season_match_ids(competition_id, season_id):
+    """Stored matches of a competition season."""
+    matches = match_store.load_matches(competition_id, season_id)
+    return [int(m) for m in matches['match_id'] if match_store.has_match(m)]
+
+
+def pass_accuracy(stats):
+    """Completed share of attempted passes, in percent."""
+    return 100.0 * stats['passes_completed'] / stats['passes_attempted'] if stats['passes_attempted'] else 0.0
+
+
+# -------------------------
+# Player names
+# -------------------------
+def _name_tokens(name):
+    plain = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().lower()
+    return plain.replace('-', ' ').split()
+
+
+def resolve_player(name, players):
+    """The StatsBomb name in ``players`` for a display name such as "Lionel Messi" (None if no match).
+
+    An exact match wins; otherwise every word of ``name`` (accents ignored) must
+    appear in the full name, the shortest such name winning.
+    """
+    if name in players:
+        return name
+    wanted = set(_name_tokens(name))
+    candidates = [p for p in players if wanted <= set(_name_tokens(p))]
+    return min(candidates, key=len) if candidates else None
+
+
+# -------------------------
+# Bulk build
+# -------------------------
+def _build_worker(match_id):
+    """Process-pool task: build one match's table and report (match_id, player count, error)."""
+    try:
+        return match_id, len(match_table(match_id)), None
+    except Exception as e:
+        return match_id, 0, f"{type(e).__name__}: {e}"
+
+
+def build(match_ids, workers=None):
+    """Build (or refresh) the stats tables of many matches in parallel; returns the failed match ids."""
+    failed = []
+    start = time.perf_counter()
+    xg_model.get_model()  # Fail early, in this process, if there is no model to score shots with
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_build_worker, match_id) for match_id in match_ids]
+        for done, future in enumerate(as_completed(futures), start=1):
+            match_id, n_players, error = future.result()
+            if error:
+                failed.append(match_id)
+                print(f"  [{done}/{len(match_ids)}] match {match_id} failed: {error}")
+            else:
+                print(f"  [{done}/{len(match_ids)}] match {match_id}: {n_players} players")
+    print(f"Built player stats of {len(match_ids) - len(failed)} matches in {time.perf_counter() - start:.1f}s"
+          + (f", {len(failed)} failed (re-run to retry)" if failed else ""))
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and inspect the per-player match stats tables.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build_cmd = sub.add_parser('build', help="Build the stats of every stored match of a competition season")
+    build_cmd.add_argument('--competition-id', type=int, default=43)
+    build_cmd.add_argument('--season-id', type=int, default=106)
+    build_cmd.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+
+    show = sub.add_parser('show', help="Print a match's stats table")
+    show.add_argument('--match-id', type=int, default=match_store.WORLD_CUP_FINAL)
+
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        failed = build(season_match_ids(args.competition_id, args.season_id), workers=args.workers)
+        raise SystemExit(1 if failed else 0)
+    elif args.command == 'show':
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(match_table(args.match_id).round(2).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
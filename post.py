@@ -1,314 +1,544 @@
-import pandas as pd
+import startup
 
-import numpy as np
+with startup.phase("post: import flask + numpy"):
 
-from sklearn.linear_model import LogisticRegression
+    import numpy as np
 
-from sklearn.model_selection import train_test_split
+    from flask import Flask, jsonify, render_template, request
 
-import matplotlib
+import os
 
-matplotlib.use('Agg')  # Thread-safe backend
+import threading
 
-import matplotlib.pyplot as plt
+import http_cache
 
-import seaborn as sns
+ 
 
-from mplsoccer import Pitch
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
 
-from statsbombpy import sb
+app = Flask(__name__, static_folder=None)  # /static is served by serve_static, with caching headers
 
-import os
+ 
 
-from flask import Flask, render_template, send_from_directory
+# Ensure static folder exists
+
+if not os.path.exists(STATIC_DIR):
+
+    os.makedirs(STATIC_DIR)
 
  
 
-app = Flask(__name__)
+teams = ['Argentina', 'France']
+
+WINDOWS = [3, 5, 10, 15]  # "Last N minutes" views offered on the insights page
+
+DEFAULT_WINDOW = 5
+
+MATCH_ID = 3869685
 
  
 
-# Ensure static folder exists
+# Tactic plots are cached on disk by a hash of everything that shapes them
+
+RENDER_VERSION = 3  # Bump when the drawing code changes
+
+FIGSIZE = (14, 7)
+
+DPI = 100
 
-if not os.path.exists('static'):
+PITCH_STYLE = {'pitch_color': 'grass', 'line_color': 'white'}
 
-    os.makedirs('static')
+RENDER_DIR = os.path.join(STATIC_DIR, 'renders')  # Immutable URLs: a key hashes everything that shapes its plot
+
+RENDER_FORMAT = http_cache.IMAGE_FORMAT  # png, or webp with AI_COACH_WEBP=1
+
+RENDER_CACHE_MB = int(os.environ.get('AI_COACH_RENDER_CACHE_MB', 200))
+
+# Matchday mode: pre-render every plot in a process pool and only ever serve finished ones
+
+PRERENDER = os.environ.get('AI_COACH_PRERENDER', '').lower() in ('1', 'true', 'yes')
+
+_render_cache = None
+
+_tactic_grids = {}  # (window, rules version) -> rules evaluated over every minute and team
+
+ 
+
+# Match data, shot xG and the stats timeline are built on first use (or by the optional
+
+# background warm-up), so the server starts answering immediately
+
+_state = None
+
+_state_lock = threading.Lock()
+
+_plot_modules = None
 
  
 
-# Fetch StatsBomb Data (2022 WC Final)
+def load_state():
+
+    """Load the 2022 WC Final and build everything the insight pages need."""
 
-events = sb.events(match_id=3869685)
+    with startup.phase("post: import pandas + match store"):
 
-shots_df = events[events['type'] == 'Shot'].copy()
+        import match_store
 
-passes = events[events['type'] == 'Pass'].copy()
+        import xg_model
 
-pressures = events[events['type'] == 'Pressure']
+        from event_index import build_event_index
 
-duels = events[events['type'] == 'Duel']
+        from timeline import build_rolling, build_timeline
 
  
 
-# Enhanced xG Features
+    # Load StatsBomb Data (2022 WC Final) from the local match store
 
-shots_df['distance'] = np.sqrt((120 - shots_df['location'].apply(lambda x: x[0])) ** 2 +
+    with startup.phase("post: load match data"):
 
-                               (40 - shots_df['location'].apply(lambda x: x[1])) ** 2)
+        events = match_store.load_events(match_id=MATCH_ID, categorical=True)
 
-shots_df['angle'] = np.arctan2(40 - shots_df['location'].apply(lambda x: x[1]),
+        data_version = match_store.data_version(MATCH_ID)
 
-                               120 - shots_df['location'].apply(lambda x: x[0])).abs() * 180 / np.pi
+        passes = events[events['type'] == 'Pass'].copy()
 
-shots_df['goal'] = shots_df['shot_outcome'].apply(lambda x: 1 if x == 'Goal' else 0)
+        pressures = events[events['type'] == 'Pressure']
 
-shots_df['is_header'] = shots_df['shot_body_part'].apply(lambda x: 1 if x == 'Head' else 0)
+        duels = events[events['type'] == 'Duel']
 
-shots_df['is_open_play'] = shots_df['shot_type'].apply(lambda x: 1 if x == 'Open Play' else 0)
+        event_index = build_event_index(events)
 
-shots_df['under_pressure'] = shots_df['under_pressure'].fillna(False).astype(int, copy=False)
+ 
+
+    with startup.phase("post: shot xG"):
+
+        shots_df = xg_model.load_shots(match_id=MATCH_ID, categorical=True)
+
+        shot_index = build_event_index(shots_df, columns=['team'], pairs=[])
+
+ 
+
+    with startup.phase("post: stats timeline"):
+
+        stats_timeline = build_timeline(events, shots_df, teams)
+
+        rolling = build_rolling(events, xg=events['id'].map(shots_df.set_index('id')['xG']))
 
  
 
-def goalkeeper_distance(row):
+    return {
+
+        'events': events,
 
-    if isinstance(row['shot_freeze_frame'], list):
+        'event_index': event_index,
 
-        for player in row['shot_freeze_frame']:
+        'shots_df': shots_df,
 
-            if player['position'] == 'Goalkeeper':
+        'shot_index': shot_index,
 
-                gk_pos = player['location']
+        'passes': passes,
 
-                shot_pos = row['location']
+        'pressures': pressures,
 
-                return np.sqrt((shot_pos[0] - gk_pos[0])**2 + (shot_pos[1] - gk_pos[1])**2)
+        'duels': duels,
 
-    return np.nan
+        'timeline': stats_timeline,
 
-shots_df['gk_distance'] = shots_df.apply(goalkeeper_distance, axis=1)
+        'rolling': rolling,
 
-shots_df['gk_distance'] = shots_df['gk_distance'].fillna(shots_df['gk_distance'].mean())
+        'data_version': data_version,
+
+    }
 
  
 
-def defender_count(row, radius=5):
+def get_state():
+
+    """The loaded match state, built on first use and rebuilt if the stored events changed (e.g. a re-ingest)."""
 
-    if isinstance(row['shot_freeze_frame'], list):
+    import match_store
 
-        shot_pos = row['location']
+    global _state
 
-        defenders = [p for p in row['shot_freeze_frame'] if not p['teammate'] and p['position'] != 'Goalkeeper']
+    with _state_lock:
 
-        return sum(1 for d in defenders if np.sqrt((shot_pos[0] - d['location'][0])**2 + (shot_pos[1] - d['location'][1])**2) <= radius)
+        if _state is None or _state['data_version'] != match_store.data_version(MATCH_ID):
 
-    return 0
+            _state = load_state()
 
-shots_df['defender_density'] = shots_df.apply(defender_count, axis=1)
+    return _state
 
  
 
-shots_df['is_volley'] = shots_df['shot_technique'].apply(lambda x: 1 if x == 'Volley' else 0)
+def _plotting():
 
-shots_df['is_big_chance'] = shots_df['shot_key_pass_id'].notna().astype(int)
+    """Import the plotting stack on first render; returns the pitch figure cache."""
+
+    global _plot_modules
+
+    if _plot_modules is None:
+
+        with startup.phase("post: import plotting"):
+
+            import matplotlib
+
+            matplotlib.use('Agg')  # Non-GUI backend
+
+            import pitch_cache  # Pooled, reusable pitch figures, no pyplot global state
+
+            pitch_cache.get_pitch(**PITCH_STYLE)  # Imports mplsoccer
+
+        _plot_modules = pitch_cache
+
+    return _plot_modules
 
  
 
-# Ensure no NaNs
+def get_render_cache():
+
+    """The tactic plot cache, indexed from disk on first use."""
+
+    global _render_cache
 
-features = ['distance', 'angle', 'is_header', 'is_open_play', 'under_pressure', 'gk_distance', 'defender_density', 'is_volley', 'is_big_chance']
+    with _state_lock:
 
-for feature in features:
+        if _render_cache is None:
 
-    shots_df[feature] = shots_df[feature].fillna(0)
+            from render_cache import RenderCache
+
+            _render_cache = RenderCache(RENDER_DIR, max_bytes=RENDER_CACHE_MB * 1024 * 1024, extension=RENDER_FORMAT)
+
+    return _render_cache
 
  
 
-# Train xG Model
+def ai_coach_suggestion(team, minute, window=DEFAULT_WINDOW, render=True):
 
-X = shots_df[features]
+    """Suggestion, stats and tactic plot URL for a team at a minute; repeat views are served from the cache.
 
-y = shots_df['goal']
+ 
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    With render=False only a finished render is returned (None if there is none yet).
 
-model = LogisticRegression(max_iter=1000).fit(X_train, y_train)
+    """
 
-shots_df['xG'] = model.predict_proba(X)[:, 1]
+    import match_store
 
-print(f"Enhanced xG Model Accuracy: {model.score(X_test, y_test):.2f}")
+    import tactic_rules
+
+    import xg_model
+
+    from render_cache import render_key
+
+    params = {
+
+        'match_id': MATCH_ID, 'data_version': match_store.data_version(MATCH_ID),
+
+        'team': team, 'minute': minute, 'window': window,
+
+        'model_version': xg_model.model_version(), 'render_version': RENDER_VERSION,
+
+        'rules_version': tactic_rules.load('post')['version'],
+
+        'figsize': FIGSIZE, 'dpi': DPI, 'format': RENDER_FORMAT,
+
+    }
+
+    cache = get_render_cache()
+
+    if render:
+
+        key, meta = cache.get_or_render(params, lambda path: render_suggestion(team, minute, window, path))
+
+    else:
+
+        key = render_key(params)
+
+        meta = cache.get(key)
+
+        if meta is None:
+
+            return None
+
+    return {
+
+        'suggestion': meta['suggestion'],
+
+        'stats': meta['stats'],
+
+        'plot_url': f"/static/renders/{key}.{RENDER_FORMAT}"
+
+    }
 
  
 
-# Precompute per-minute stats
+def rule_metrics(window=DEFAULT_WINDOW):
 
-teams = ['Argentina', 'France']
+    """Every metric the post rules can use, for each minute 0-120 (rows) and team (columns)."""
 
-per_minute_stats = {team: {'xG': [], 'Possession': [], 'Pass_Success': []} for team in teams}
+    from event_index import select
 
-for minute in range(1, 121):
+    from timeline import snapshots, window_series
 
-    events_up_to_minute = events[events['minute'] <= minute]
+    state = get_state()
 
-    shots_up_to_minute = shots_df[shots_df['minute'] <= minute]
+    minutes = np.arange(0, 121)
 
-   
+    columns = []
 
     for team in teams:
 
-        # xG up to this minute
+        opp_team = 'France' if team == 'Argentina' else 'Argentina'
 
-        team_xG = shots_up_to_minute[shots_up_to_minute['team'] == team]['xG'].sum()
+        # Dynamic stats: match totals from the timeline, the last `window` minutes from the rolling sums
 
-        opp_xG = shots_up_to_minute[shots_up_to_minute['team'] != team]['xG'].sum()
+        team_now = snapshots(state['timeline'], team, minutes)
 
-        xG_diff = team_xG - opp_xG
+        team_recent = window_series(state['rolling'], team, minutes, window)
 
-        per_minute_stats[team]['xG'].append(xG_diff)
+        opp_recent = window_series(state['rolling'], opp_team, minutes, window)
 
-       
+        with np.errstate(invalid='ignore', divide='ignore'):
 
-        # Possession (approximated from possession_team events)
+            avg_xg = np.where(team_now['shots'] > 0, team_now['xG'] / team_now['shots'], 0.0)
 
-        possession_events = events_up_to_minute[events_up_to_minute['possession_team'].notna()]
+        columns.append({
 
-        possession_pct = (possession_events['possession_team'] == team).mean() * 100 if not possession_events.empty else 50.0
+            'xG_diff': team_now['xG_diff'],
 
-        per_minute_stats[team]['Possession'].append(possession_pct)
+            'possession': team_now['possession'],
 
-       
+            'pass_success': team_recent['pass_completion'],
 
-        # Pass Success (5-minute window)
+            'opp_pass_success': opp_recent['pass_completion'],
 
-        recent_passes = passes[(passes['minute'] > max(0, minute - 5)) & (passes['minute'] <= minute)]
+            'avg_xg_shot': avg_xg,
 
-        pass_success = recent_passes[recent_passes['team'] == team]['pass_outcome'].isna().mean() * 100 if not recent_passes.empty else 0.0
+            'xG_recent': team_recent['xG_for'],
 
-        per_minute_stats[team]['Pass_Success'].append(pass_success)
+            'opp_xG_recent': team_recent['xG_against'],
 
- 
+            'duel_win_rate': team_recent['duel_win_rate'],
 
-def ai_coach_suggestion(team, minute):
+            'pressure_count': np.full(len(minutes), len(select(state['events'], state['event_index'],
 
-    events_up_to_minute = events[events['minute'] <= minute]
+                                                                team=team, type='Pressure'))),
 
-    shots_up_to_minute = shots_df[shots_df['minute'] <= minute]
+            # Side of the pitch the team's (or the opponent's) shots so far came from
 
-    opp_team = 'France' if team == 'Argentina' else 'Argentina'
+            'team_shot_y': _mean_shot_y(team, minutes),
+
+            'opp_shot_y': _mean_shot_y(opp_team, minutes),
+
+        })
+
+    metrics = {name: np.stack([column[name] for column in columns], axis=1) for name in columns[0]}
+
+    metrics['minute'] = minutes[:, None]
+
+    metrics['opp_team'] = np.array([['France' if team == 'Argentina' else 'Argentina' for team in teams]])
+
+    return metrics
 
  
 
-    # Dynamic stats
+def tactic_grid(window=DEFAULT_WINDOW):
+
+    """The post rules evaluated for every minute and team at once, cached per window and rule-table version."""
+
+    import tactic_rules
+
+    table = tactic_rules.load('post')
+
+    key = (window, table['version'])
+
+    grid = _tactic_grids.get(key)
+
+    if grid is None:
+
+        metrics = rule_metrics(window)
 
-    team_xG = shots_up_to_minute[shots_up_to_minute['team'] == team]['xG'].sum()
+        grid = {'table': table, 'metrics': metrics, 'rule': tactic_rules.evaluate(table, metrics)}
 
-    opp_xG = shots_up_to_minute[shots_up_to_minute['team'] == opp_team]['xG'].sum()
+        with _state_lock:
 
-    xG_diff = team_xG - opp_xG
+            for old_key in [k for k in _tactic_grids if k[1] != table['version']]:
 
-    possession = per_minute_stats[team]['Possession'][minute - 1]
+                del _tactic_grids[old_key]  # The rules were edited
 
-    pass_success = per_minute_stats[team]['Pass_Success'][minute - 1]
+            _tactic_grids[key] = grid
 
-    opp_pass_success = per_minute_stats[opp_team]['Pass_Success'][minute - 1]
+    return grid
 
-    pressure_count = pressures[pressures['team'] == team].shape[0]
+ 
+
+def assess(team, minutes, window=DEFAULT_WINDOW):
+
+    """Stats, rule and suggestion for a team at each of `minutes` (0-120), looked up in the tactic grid.
 
  
 
-    recent_shots = shots_df[(shots_df['minute'] > max(0, minute - 5)) & (shots_df['minute'] <= minute)]
+    Returns columns: 'minute', 'scenario' (rule id), 'plot', 'title', 'zone' (flank
+
+    or weak zone, None if the rule has none), 'suggestion' and 'stats' (stat name -> array).
+
+    """
+
+    from tactic_rules import describe
+
+    grid = tactic_grid(window)
+
+    table, metrics = grid['table'], grid['metrics']
+
+    minutes = np.asarray(minutes, dtype=np.int64)
+
+    column = teams.index(team)
+
+    stat_metrics = {
+
+        'xG Diff': 'xG_diff',
+
+        'Possession %': 'possession',
+
+        'Pass Success %': 'pass_success',
 
-    team_xG_recent = recent_shots[recent_shots['team'] == team]['xG'].sum()
+        'Avg xG/Shot': 'avg_xg_shot',
 
-    opp_xG_recent = recent_shots[recent_shots['team'] == opp_team]['xG'].sum()
+        f'xG Last {window} Min': 'xG_recent',
+
+        f'Duels Won % Last {window} Min': 'duel_win_rate',
+
+        'Pressure Count': 'pressure_count',
+
+    }
+
+    stats = {stat: metrics[name][minutes, column] for stat, name in stat_metrics.items()}
 
  
 
-    # Setup figure
+    result = {'minute': minutes, 'scenario': [], 'plot': [], 'title': [], 'zone': [], 'suggestion': []}
 
-    fig = plt.figure(figsize=(14, 7))
+    for minute in minutes.tolist():
 
-    ax_pitch = fig.add_axes([0.05, 0.05, 0.65, 0.9])
+        rule, fields = describe(table, grid['rule'], metrics, (minute, column))
 
-    ax_stats = fig.add_axes([0.75, 0.05, 0.2, 0.9])
+        rule = rule or {'id': 'hold_steady'}  # A table without a catch-all rule
 
-    pitch = Pitch(pitch_color='grass', line_color='white')
+        result['scenario'].append(rule['id'])
 
-    pitch.draw(ax=ax_pitch)
+        result['plot'].append(rule.get('plot', rule['id']))
+
+        result['title'].append(fields.get('title', rule['id']))
+
+        result['zone'].append(fields.get('zone'))
+
+        result['suggestion'].append(fields.get('text', ""))
+
+    result['stats'] = stats
+
+    return result
 
  
 
-    stats = {
+def _mean_shot_y(team, minutes):
 
-        'xG Diff': xG_diff,
+    """Mean y of a team's shots up to each of `minutes` (NaN before its first shot)."""
 
-        'Possession %': possession,
+    from event_index import select
 
-        'Pass Success %': pass_success,
+    state = get_state()
 
-        'Avg xG/Shot': shots_up_to_minute[shots_up_to_minute['team'] == team]['xG'].mean() if not shots_up_to_minute[shots_up_to_minute['team'] == team].empty else 0.0,
+    shots = select(state['shots_df'], state['shot_index'], team=team)
 
-        'Pressure Count': pressure_count
+    order = np.argsort(shots['minute'].to_numpy(), kind='stable')
 
-    }
+    shot_minutes = shots['minute'].to_numpy()[order]
+
+    total_y = np.concatenate([[0.0], np.cumsum(shots['y'].to_numpy(dtype=np.float64)[order])])
+
+    count = np.searchsorted(shot_minutes, minutes, side='right')
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+
+        return np.where(count > 0, total_y[count] / count, np.nan)
 
  
 
-    # Tactical Scenarios
+def render_suggestion(team, minute, window, path):
+
+    """Work out the suggestion and draw its tactic plot to `path`."""
+
+    from event_index import select
+
+    from density import plot_density
+
+    pitch_cache = _plotting()
 
-    if xG_diff > 0.5 and possession > 55:
+    state = get_state()
 
-        shot_locs = shots_up_to_minute[shots_up_to_minute['team'] == team]['location']
+    events, event_index = state['events'], state['event_index']
 
-        flank = "left" if shot_locs.apply(lambda x: x[1]).mean() < 40 else "right"
+    shots_df, shot_index = state['shots_df'], state['shot_index']
 
-        sns.kdeplot(x=shot_locs.apply(lambda x: x[0]), y=shot_locs.apply(lambda x: x[1]), fill=True, cmap='Reds', ax=ax_pitch)
+    opp_team = 'France' if team == 'Argentina' else 'Argentina'
+
+    team_shots_all = select(shots_df, shot_index, team=team)
 
-        pitch.arrows(60, 20 if flank == 'left' else 60, 100, 20 if flank == 'left' else 60, ax=ax_pitch, color='blue')
+    opp_shots_all = select(shots_df, shot_index, team=opp_team)
 
-        ax_pitch.set_title(f"{team}: Push {flank} Flank")
+    team_shots_to_minute = team_shots_all[team_shots_all['minute'] <= minute]
 
-        suggestion = f"Push the {flank} flank—xG diff {stats['xG Diff']:.2f}, possession {stats['Possession %']:.1f}%."
+    opp_shots_to_minute = opp_shots_all[opp_shots_all['minute'] <= minute]
 
  
 
-    elif xG_diff < -0.5 and minute > 75:
+    assessment = assess(team, [minute], window)
 
-        opp_shots = shots_up_to_minute[shots_up_to_minute['team'] == opp_team]['location']
+    plot, zone = assessment['plot'][0], assessment['zone'][0]
 
-        weak_zone = "left" if opp_shots.apply(lambda x: x[1]).mean() < 40 else "right"
+    stats = {name: values[0].item() for name, values in assessment['stats'].items()}
 
-        sns.kdeplot(x=opp_shots.apply(lambda x: x[0]), y=opp_shots.apply(lambda x: x[1]), fill=True, cmap='Reds', ax=ax_pitch)
+ 
 
-        pitch.lines(0, 20 if weak_zone == 'left' else 60, 40, 20 if weak_zone == 'left' else 60, ax=ax_pitch, color='yellow', lw=3)
+    # Setup figure
 
-        ax_pitch.set_title(f"{team}: Defend {weak_zone} Zone")
+    fig, ax_pitch, pitch = pitch_cache.pitch_figure(PITCH_STYLE, FIGSIZE, rect=[0.05, 0.05, 0.65, 0.9])
 
-        suggestion = f"Drop back to defend {weak_zone}—xG diff {stats['xG Diff']:.2f}, opp recent xG {opp_xG_recent:.2f}."
+    ax_stats = fig.add_axes([0.75, 0.05, 0.2, 0.9])
+
+    ax_pitch.set_title(f"{team}: {assessment['title'][0]}")
 
  
 
-    elif pass_success > 85 and opp_pass_success < 70:
+    # Drawing per rule 'plot'; unknown plots get the team's shot density
+
+    if plot == 'push_flank':
 
-        opp_pressures = pressures[pressures['team'] == opp_team]['location']
+        plot_density(ax_pitch, team_shots_to_minute['x'], team_shots_to_minute['y'], cmap='Reds')
 
-        pitch.scatter(opp_pressures.apply(lambda x: x[0]), opp_pressures.apply(lambda x: x[1]), ax=ax_pitch, c='red', s=50)
+        pitch.arrows(60, 20 if zone == 'left' else 60, 100, 20 if zone == 'left' else 60, ax=ax_pitch, color='blue')
 
-        ax_pitch.set_title(f"{team}: Press High")
+ 
+
+    elif plot == 'defend_zone':
 
-        suggestion = f"Press high—pass success {stats['Pass Success %']:.1f}% vs. {opp_team}'s {opp_pass_recent*100:.1f}%."
+        plot_density(ax_pitch, opp_shots_to_minute['x'], opp_shots_to_minute['y'], cmap='Reds')
+
+        pitch.lines(0, 20 if zone == 'left' else 60, 40, 20 if zone == 'left' else 60, ax=ax_pitch, color='yellow', lw=3)
 
  
 
-    else:
+    elif plot == 'press_high':
 
-        sns.kdeplot(x=shots_up_to_minute[shots_up_to_minute['team'] == team]['location'].apply(lambda x: x[0]),
+        opp_pressures = select(events, event_index, team=opp_team, type='Pressure')
 
-                    y=shots_up_to_minute[shots_up_to_minute['team'] == team]['location'].apply(lambda x: x[1]), fill=True, cmap='Reds', ax=ax_pitch)
+        pitch.scatter(opp_pressures['x'], opp_pressures['y'], ax=ax_pitch, c='red', s=50)
 
-        ax_pitch.set_title(f"{team}: Hold Steady")
+ 
+
+    else:
 
-        suggestion = f"Hold steady—xG diff {stats['xG Diff']:.2f}, recent xG {team_xG_recent:.2f}."
+        plot_density(ax_pitch, team_shots_to_minute['x'], team_shots_to_minute['y'], cmap='Reds')
 
  
 
@@ -322,21 +552,17 @@ def ai_coach_suggestion(team, minute):
 
  
 
-    filename = f"tactic_plot_{team}_{minute}.png"
+    fig.savefig(path, dpi=DPI, format=RENDER_FORMAT, **http_cache.SAVE_KWARGS[RENDER_FORMAT])
 
-    plt.savefig(os.path.join('static', filename))
-
-    plt.close()
+    pitch_cache.release(fig)
 
  
 
     return {
 
-        'suggestion': suggestion,
-
-        'stats': stats,
+        'suggestion': assessment['suggestion'][0],
 
-        'plot_url': f"/static/{filename}"
+        'stats': stats
 
     }
 
@@ -362,13 +588,133 @@ def insights(minute):
 
  
 
-    argentina_insight = ai_coach_suggestion('Argentina', minute)
+    window = request.args.get('window', DEFAULT_WINDOW, type=int)
+
+    if window not in WINDOWS:
+
+        return f"Invalid window. Use one of {WINDOWS} minutes.", 400
+
+ 
+
+    argentina_insight = ai_coach_suggestion('Argentina', minute, window, render=not PRERENDER)
+
+    france_insight = ai_coach_suggestion('France', minute, window, render=not PRERENDER)
+
+    if argentina_insight is None or france_insight is None:
+
+        return f"Insights for minute {minute} are still being pre-rendered; try again shortly.", 503, {'Retry-After': '5'}
+
+ 
+
+    return render_template('insights.html', minute=minute, window=window, windows=WINDOWS,
+
+                           argentina=argentina_insight, france=france_insight)
+
+ 
+
+def _json_column(values, digits=3):
+
+    """A numeric column as a JSON list: floats rounded to `digits`, NaN as null."""
+
+    values = np.asarray(values)
+
+    if values.dtype.kind in 'iub':
+
+        return values.tolist()
+
+    rounded = np.round(values.astype(np.float64), digits)
+
+    return [None if v != v else v for v in rounded.tolist()]
+
+ 
+
+def _locations(frame, start, end, extra=()):
+
+    """Minute, second and x/y (plus `extra` columns) of the rows of `frame` within [start, end], as columns."""
+
+    frame = frame[frame['minute'].between(start, end)]
+
+    columns = {name: _json_column(frame[name], 1) for name in ('minute', 'second', 'x', 'y')}
+
+    for name in extra:
+
+        column = frame[name]
+
+        columns[name] = _json_column(column) if column.dtype.kind in 'iufb' else column.astype(object).where(column.notna(), None).tolist()
+
+    return columns
+
+ 
+
+@app.route('/api/insights')
+
+def api_insights():
+
+    """Suggestions and stats for every minute of a range, plus the raw shot and pressure locations, as JSON columns.
+
+ 
+
+    /api/insights?team=France&from=60&to=90&window=5 (team defaults to both, the range to the whole match)
+
+    """
+
+    from event_index import select
+
+    team = request.args.get('team')
+
+    start = request.args.get('from', 1, type=int)
+
+    end = request.args.get('to', 120, type=int)
+
+    window = request.args.get('window', DEFAULT_WINDOW, type=int)
+
+    if team is not None and team not in teams:
+
+        return jsonify(error=f"Unknown team. Use one of {teams}."), 400
 
-    france_insight = ai_coach_suggestion('France', minute)
+    if not 1 <= start <= end <= 120:
+
+        return jsonify(error="Invalid range. Use 1 <= from <= to <= 120."), 400
+
+    if window not in WINDOWS:
+
+        return jsonify(error=f"Invalid window. Use one of {WINDOWS} minutes."), 400
 
  
 
-    return render_template('insights.html', minute=minute, argentina=argentina_insight, france=france_insight)
+    state = get_state()
+
+    minutes = np.arange(start, end + 1)
+
+    body = {'match_id': MATCH_ID, 'from': start, 'to': end, 'window': window, 'teams': {}}
+
+    for name in [team] if team else teams:
+
+        assessment = assess(name, minutes, window)
+
+        body['teams'][name] = {
+
+            'minute': assessment['minute'].tolist(),
+
+            'scenario': assessment['scenario'],
+
+            'zone': assessment['zone'],
+
+            'suggestion': assessment['suggestion'],
+
+            'stats': {stat: _json_column(values) for stat, values in assessment['stats'].items()},
+
+            'shots': _locations(select(state['shots_df'], state['shot_index'], team=name), start, end,
+
+                                extra=('xG', 'shot_outcome', 'player')),
+
+            'pressures': _locations(select(state['events'], state['event_index'], team=name, type='Pressure'),
+
+                                    start, end),
+
+        }
+
+    return jsonify(body)
 
  
 
@@ -376,10 +722,28 @@ def insights(minute):
 
 def serve_static(filename):
 
-    return send_from_directory('static', filename)
+    if filename.startswith('renders/'):
+
+        return http_cache.send_immutable(STATIC_DIR, filename)
+
+    return http_cache.send_revalidated(STATIC_DIR, filename)
 
  
 
 if __name__ == '__main__':
 
-    app.run(debug=True, threaded=False)
\ No newline at end of file
+    # Opt-in (AI_COACH_WARMUP=1): build the match state in the background instead of on the first insight request
+
+    if startup.WARMUP and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':  # Reloader child only
+
+        startup.warm_up(get_state, "post data warm-up")
+
+    if PRERENDER and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+
+        import prerender
+
+        startup.warm_up(prerender.prerender, "post pre-render")
+
+    startup.report("post start-up")
+
+    app.run(debug=True, threaded=True)  # Renders use per-request figures, so requests can overlap
\ No newline at end of file
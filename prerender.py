@@ -0,0 +1,96 @@
+"""Pre-render the post-match insight plots across a process pool.
+
+Every (team, minute, window) page of post.py is rendered into its render cache
+ahead of time, so matchday clicks are file serves with predictable latency.
+Renders already in the cache are skipped, so re-running resumes.
+
+Usage:
+    python prerender.py --workers 8
+    python prerender.py --windows 5 --first-minute 1 --last-minute 90
+    AI_COACH_PRERENDER=1 python post.py      # Render in the background, serve finished plots only
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+def _init_worker():
+    """Load the match state and plotting stack once per worker process."""
+    import post
+
+    post.get_state()
+    post._plotting()
+
+
+def _render_worker(task):
+    """Process-pool task: render one insight page and report (task, 'rendered'/'cached', error)."""
+    import post
+
+    team, minute, window = task
+    cache = post.get_render_cache()
+    hits = cache.hits
+    try:
+        post.ai_coach_suggestion(team, minute, window)
+    except Exception as e:
+        return task, None, f"{type(e).__name__}: {e}"
+    return task, 'cached' if cache.hits > hits else 'rendered', None
+
+
+def prerender(minutes=range(1, 121), windows=None, workers=None, progress_every=20):
+    """Render every team/minute/window insight plot of post.py; returns the list of failed tasks.
+
+    ``windows`` defaults to all of ``post.WINDOWS``: with ``AI_COACH_PRERENDER`` set
+    the app serves only pre-rendered plots, so every window it offers is covered.
+    """
+    import post
+
+    windows = windows or list(post.WINDOWS)
+    todo = [(team, minute, window) for window in windows for minute in minutes for team in post.teams]
+    print(f"Pre-rendering {len(todo)} insight plots for match {post.MATCH_ID} "
+          f"({len(post.teams)} teams x {len(minutes)} minutes x {len(windows)} windows)")
+
+    counts = {'rendered': 0, 'cached': 0}
+    failed = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_render_worker, task) for task in todo]
+        for done, future in enumerate(as_completed(futures), start=1):
+            task, outcome, error = future.result()
+            if error:
+                failed.append(task)
+                print(f"  [{done}/{len(todo)}] {task} failed: {error}")
+            else:
+                counts[outcome] += 1
+            if done % progress_every == 0 or done == len(todo):
+                elapsed = time.perf_counter() - start
+                print(f"  [{done}/{len(todo)}] {counts['rendered']} rendered, {counts['cached']} already cached "
+                      f"({elapsed:.1f}s, {done / elapsed:.1f} plots/s)")
+
+    wall = time.perf_counter() - start
+    print(f"Pre-rendered {counts['rendered']} plots ({counts['cached']} cached) in {wall:.1f}s"
+          + (f", {len(failed)} failed (re-run to retry)" if failed else ""))
+    cache = post.get_render_cache()
+    total = sum(os.path.getsize(os.path.join(cache.directory, name)) for name in os.listdir(cache.directory))
+    if total > cache.max_bytes:
+        print(f"Warning: the plots take {total / 2**20:.0f} MB, more than the {cache.max_bytes / 2**20:.0f} MB "
+              f"render cache budget (AI_COACH_RENDER_CACHE_MB); the oldest will be evicted")
+    return failed
+
+
+def main(argv=None):
+    import post
+
+    parser = argparse.ArgumentParser(description="Pre-render every post-match insight plot into the render cache.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--windows', type=int, nargs='+', default=list(post.WINDOWS), choices=post.WINDOWS,
+                        help="Recent-form windows in minutes (default: all)")
+    parser.add_argument('--first-minute', type=int, default=1)
+    parser.add_argument('--last-minute', type=int, default=120)
+    args = parser.parse_args(argv)
+    failed = prerender(range(args.first_minute, args.last_minute + 1), args.windows, workers=args.workers)
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""Content-addressed disk cache for rendered plots.
+
+A render is identified by a hash of everything that determines its pixels
+(match, team, minute, model version, drawing parameters...). The cache keeps
+``<key>.png`` plus ``<key>.json`` with whatever the caller wants to reuse (e.g.
+the suggestion text and stats shown next to the plot), so a repeat request is a
+file lookup instead of a matplotlib render. Entries are evicted least recently
+used first once the directory grows past its byte budget; the index lives in
+memory and is rebuilt from the files (access times included) on start-up.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def render_key(params):
+    """Stable hash of a JSON-serialisable dict of render inputs."""
+    encoded = json.dumps(params, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:24]
+
+
+def _json_default(value):
+    if hasattr(value, 'item'):  # numpy scalars
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+
+class RenderCache:
+    """LRU, size-bounded directory of ``<key>.png`` renders with JSON metadata."""
+
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024, extension='png'):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> bytes on disk, least recently used first
+        self._meta = {}  # key -> metadata, for entries read or written by this process
+        self._size = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}  # key -> lock, so one render per key runs at a time
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return f"{base}.{self.extension}", f"{base}.json"
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            key = name[:-5]
+            image_path, meta_path = self._paths(key)
+            if not os.path.exists(image_path):
+                continue
+            stat = os.stat(image_path)
+            entries.append((stat.st_atime, key, stat.st_size + os.path.getsize(meta_path)))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._size += size
+        with self._lock:
+            evicted = self._evict()  # The budget may be smaller than when the files were written
+        for old_key in evicted:
+            self._remove_files(old_key)
+
+    def path(self, key):
+        """Path of the rendered file for ``key`` (it may not exist)."""
+        return self._paths(key)[0]
+
+    def _adopt(self, key):
+        """Index a render another process (e.g. the pre-render pool) wrote since start-up."""
+        image_path, meta_path = self._paths(key)
+        try:
+            size = os.path.getsize(image_path) + os.path.getsize(meta_path)
+        except OSError:
+            return False
+        self._entries[key] = size
+        self._size += size
+        return True
+
+    def get(self, key, count=True):
+        """Metadata of a cached render, marking it recently used; None on a miss."""
+        with self._lock:
+            if key not in self._entries and not self._adopt(key):
+                self.misses += count
+                return None
+            self._entries.move_to_end(key)
+            self.hits += count
+            meta = self._meta.get(key)
+        image_path, meta_path = self._paths(key)
+        if meta is None:
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                self._drop(key)
+                return None
+            with self._lock:
+                self._meta[key] = meta
+        now = time.time()
+        try:
+            os.utime(image_path, (now, os.path.getmtime(image_path)))  # Persist recency across restarts
+        except OSError:
+            self._drop(key)  # Evicted by another process sharing the directory
+            return None
+        return meta
+
+    def get_or_render(self, params, render):
+        """Cached metadata for ``params``, calling ``render(path)`` (which returns the metadata) on a miss."""
+        key = render_key(params)
+        meta = self.get(key)
+        if meta is not None:
+            return key, meta
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            meta = self.get(key, count=False)  # Another thread may have rendered it while we waited
+            if meta is None:
+                meta = self.put(key, render, params)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return key, meta
+
+    def put(self, key, render, params=None):
+        """Render into the cache under ``key`` and store the metadata ``render(path)`` returns."""
+        image_path, meta_path = self._paths(key)
+        unique = f"{os.getpid()}.{threading.get_ident()}"  # Processes and threads may share the directory
+        tmp_path = f"{image_path}.{unique}.tmp.{self.extension}"
+        tmp_meta_path = f"{meta_path}.{unique}.tmp"
+        try:
+            meta = dict(render(tmp_path) or {})
+            meta.setdefault('params', params)
+            os.replace(tmp_path, image_path)
+            with open(tmp_meta_path, 'w') as f:
+                json.dump(meta, f, default=_json_default)
+            os.replace(tmp_meta_path, meta_path)
+        finally:
+            for path in (tmp_path, tmp_meta_path):  # Left behind only when rendering or saving failed
+                if os.path.exists(path):
+                    os.remove(path)
+        meta = json.loads(json.dumps(meta, default=_json_default))  # Same types as a later read from disk
+
+        size = os.path.getsize(image_path) + os.path.getsize(meta_path)
+        with self._lock:
+            self._size += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._meta[key] = meta
+            evicted = self._evict()
+        for old_key in evicted:
+            self._remove_files(old_key)
+        return meta
+
+    def _evict(self):
+        """Pop least recently used entries until the cache fits its budget (caller holds the lock)."""
+        evicted = []
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._meta.pop(key, None)
+            self._size -= size
+            evicted.append(key)
+        return evicted
+
+    def _remove_files(self, key):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def remove(self, key):
+        """Forget an entry and delete its files."""
+        self._drop(key)
+
+    def _drop(self, key):
+        with self._lock:
+            self._size -= self._entries.pop(key, 0)
+            self._meta.pop(key, None)
+        self._remove_files(key)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._size, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
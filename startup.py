@@ -0,0 +1,117 @@
+"""Start-up timing and background warm-up shared by the Flask and Dash apps.
+
+Each app wraps its import groups and data loads in ``phase(...)`` blocks and
+prints ``report()`` before it starts serving, so slow start-ups show which
+import or load is responsible. Longer warm-ups (rendering ahead of the first
+clicks) run on a small thread pool that steps aside while an ``InteractiveGate``
+sees requests in flight.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+PROCESS_START = time.perf_counter()
+WARMUP = os.environ.get('AI_COACH_WARMUP', '').lower() in ('1', 'true', 'yes')
+
+_phases = []  # (name, seconds, thread name)
+_phases_lock = threading.Lock()
+
+
+@contextmanager
+def phase(name):
+    """Time the enclosed block and record it under ``name``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _phases_lock:
+            _phases.append((name, time.perf_counter() - start, threading.current_thread().name))
+
+
+def report(title="Start-up time"):
+    """Print every recorded phase and the time since this module was first imported."""
+    with _phases_lock:
+        phases = list(_phases)
+    print(f"{title}:")
+    for name, seconds, thread in phases:
+        where = "" if thread == 'MainThread' else f"  [{thread}]"
+        print(f"  {name:<40}{seconds * 1000:>9.1f} ms{where}")
+    print(f"  {'total since start':<40}{(time.perf_counter() - PROCESS_START) * 1000:>9.1f} ms")
+
+
+def warm_up(target, name="warm-up"):
+    """Run ``target`` in a daemon thread so the server answers requests while it loads."""
+    def run():
+        with phase(name):
+            target()
+        print(f"Background {name} finished")
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+class InteractiveGate:
+    """Lets background work yield to user requests.
+
+    Request handlers run inside ``with gate.request():``; background workers call
+    ``wait_idle()`` before each task, which blocks while a request is in flight
+    and for ``settle`` seconds after the last one (the next click often follows).
+    """
+
+    def __init__(self, settle=0.5):
+        self.settle = settle
+        self._active = 0
+        self._last_end = 0.0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def request(self):
+        with self._cond:
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._last_end = time.monotonic()
+                self._cond.notify_all()
+
+    def wait_idle(self):
+        with self._cond:
+            while True:
+                if self._active:
+                    self._cond.wait()
+                    continue
+                remaining = self._last_end + self.settle - time.monotonic()
+                if remaining <= 0:
+                    return
+                self._cond.wait(remaining)
+
+
+def run_pool(tasks, run, name="warm-up", workers=2, gate=None, progress_every=10):
+    """Call ``run(task)`` for every task on ``workers`` threads, printing progress; returns the failed tasks.
+
+    With a ``gate``, each task waits until no request is in flight before it starts.
+    """
+    def work(task):
+        if gate is not None:
+            gate.wait_idle()
+        run(task)
+
+    failed = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name) as pool:
+        futures = {pool.submit(work, task): task for task in tasks}
+        for done, future in enumerate(as_completed(futures), start=1):
+            error = future.exception()
+            if error is not None:
+                failed.append(futures[future])
+                print(f"  [{name} {done}/{len(futures)}] {futures[future]} failed: {type(error).__name__}: {error}")
+            if done % progress_every == 0 or done == len(futures):
+                elapsed = time.perf_counter() - start
+                print(f"  [{name} {done}/{len(futures)}] {elapsed:.1f}s, {done / elapsed:.1f} tasks/s"
+                      + (f", {len(failed)} failed" if failed else ""))
+    return failed
@@ -0,0 +1,149 @@
+"""Declarative tactic rules, evaluated over whole grids of cells at once.
+
+A rule table is a JSON file in ``rules/`` (or ``AI_COACH_RULES_DIR``): an ordered
+list of rules, each with an ``id``, a ``when`` list of conditions that must all
+hold, a ``text`` template and any extra fields the app uses (plot, title...).
+A condition is ``[metric, op, value]``; ``value`` is a number, a string, a list
+(for ``in``) or ``{"metric": name, "times": k, "plus": c}`` to compare against
+another metric. A rule with no conditions always matches, so it makes a
+natural default at the end of a table. ``zone`` is explained in ``describe``.
+
+    {"id": "press_high", "when": [["pass_success", ">", 85], ["opp_pass_success", "<", 70]],
+     "text": "Press high—pass success {pass_success:.1f}%."}
+
+``evaluate`` takes named metric arrays for any grid (minute x team, players...)
+and returns the index of the first matching rule per cell (-1 if none), with
+one vectorised comparison per condition. That array is a tactic timeline the
+apps look up instead of re-running if/elif chains; ``describe`` fills in a
+rule's text and title for one cell. Tables are re-read when their file changes, so
+rules can be added or tuned without touching the code.
+"""
+import hashlib
+import json
+import operator
+import os
+import threading
+
+import numpy as np
+
+RULES_DIR = os.environ.get('AI_COACH_RULES_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules'))
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+    'in': np.isin,
+    'not in': lambda left, right: ~np.isin(left, right),
+}
+
+_tables = {}  # name -> (mtime, table)
+_lock = threading.Lock()
+
+
+def _check(name, table):
+    """Validate a table's rules, so a bad edit fails on load rather than mid-evaluation."""
+    ids = set()
+    for rule in table.get('rules', []):
+        rule_id = rule.get('id')
+        if not rule_id or rule_id in ids:
+            raise ValueError(f"{name}: every rule needs a unique id (got {rule_id!r})")
+        ids.add(rule_id)
+        for condition in rule.get('when', []):
+            if len(condition) != 3 or condition[1] not in OPERATORS:
+                raise ValueError(f"{name}: rule {rule_id!r} has a bad condition {condition!r} "
+                                 f"(use [metric, op, value] with op in {list(OPERATORS)})")
+
+
+def load(name):
+    """The rule table ``<RULES_DIR>/<name>.json``, re-read when the file changes.
+
+    The table gains a ``version`` (hash of the file) for cache keys. A broken
+    edit of a table that loaded before is reported and the previous rules kept.
+    """
+    path = os.path.join(RULES_DIR, f"{name}.json")
+    mtime = os.path.getmtime(path)
+    with _lock:
+        cached = _tables.get(name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    with open(path, 'rb') as f:
+        raw = f.read()
+    try:
+        table = json.loads(raw)
+        _check(name, table)
+    except ValueError as e:  # Includes JSON syntax errors
+        if not cached:
+            raise
+        print(f"Keeping the previous {name} rules, {path} is invalid: {e}")
+        table = cached[1]
+        with _lock:
+            _tables[name] = (mtime, table)
+        return table
+    table['name'] = name
+    table['version'] = hashlib.sha256(raw).hexdigest()[:12]
+    with _lock:
+        _tables[name] = (mtime, table)
+    return table
+
+
+def _operand(value, metrics):
+    if isinstance(value, dict):
+        return np.asarray(metrics[value['metric']]) * value.get('times', 1) + value.get('plus', 0)
+    return value
+
+
+def evaluate(table, metrics):
+    """Index of the first rule matching each cell of the ``metrics`` grid (-1 where none does).
+
+    ``metrics`` maps names to arrays that broadcast to one shape (scalars are fine).
+    """
+    rules = table['rules']
+    shape = np.broadcast_shapes(*(np.shape(v) for v in metrics.values()))
+    matched = np.ones((len(rules) + 1,) + shape, dtype=bool)  # The extra row catches "no rule matched"
+    for r, rule in enumerate(rules):
+        for name, op, value in rule.get('when', []):
+            if name not in metrics:
+                raise KeyError(f"{table['name']}: rule {rule['id']!r} uses unknown metric {name!r}")
+            with np.errstate(invalid='ignore'):
+                matched[r] &= np.asarray(OPERATORS[op](np.asarray(metrics[name]), _operand(value, metrics)), dtype=bool)
+    first = matched.argmax(axis=0)
+    return np.where(first == len(rules), -1, first)
+
+
+def rule_ids(table, first):
+    """Rule ids for an ``evaluate`` result (None where no rule matched)."""
+    ids = np.array([rule['id'] for rule in table['rules']] + [None], dtype=object)
+    return ids[first]
+
+
+def cell_metrics(metrics, cell):
+    """Every metric's value at one cell (an index tuple) of the grid."""
+    shape = np.broadcast_shapes(*(np.shape(v) for v in metrics.values()))
+    values = {}
+    for name, v in metrics.items():
+        value = np.broadcast_to(np.asarray(v), shape)[cell]
+        values[name] = value.item() if hasattr(value, 'item') else value
+    return values
+
+
+def describe(table, first, metrics, cell):
+    """(rule, fields) for one cell of an ``evaluate`` result; (None, {}) if no rule matched.
+
+    ``fields`` holds the rule's ``text`` and ``title`` filled from the cell's
+    metrics, and ``zone``: a rule's ``zone`` names a metric whose side of the pitch
+    (y < 40 is left) is also available to the templates as ``{zone}``.
+    """
+    index = int(np.asarray(first)[cell])
+    if index < 0:
+        return None, {}
+    rule = table['rules'][index]
+    values = cell_metrics(metrics, cell)
+    values['zone'] = None
+    if rule.get('zone'):
+        values['zone'] = 'left' if values[rule['zone']] < 40 else 'right'
+    fields = {name: rule[name].format(**values) for name in ('text', 'title') if name in rule}
+    fields['zone'] = values['zone']
+    return rule, fields
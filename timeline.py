@@ -0,0 +1,237 @@
+"""Cumulative match timeline and rolling-window metrics, from one pass over the events.
+
+Events are bucketed by (bin, team) with ``np.bincount`` and turned into running
+totals with ``cumsum``; windowed metrics are differences of those totals. The
+result is a dense ``(bins, teams, metrics)`` array, so reading the state of the
+match at any minute (or second, with ``bin_seconds=1``) is an index lookup.
+
+A bin holds everything up to and including it: with the default one-minute bins,
+``value(timeline, 'Argentina', 'xG', 60)`` counts the events with ``minute <= 60``.
+
+``build_rolling`` keeps prefix sums per team or player on a monotonic match clock
+(period-aware), so ``window_stats`` answers "the last N minutes" for any N with
+two array lookups, and ``rolling_series`` gives a whole windowed curve at once.
+"""
+import numpy as np
+
+METRICS = ['xG', 'xG_diff', 'xG_recent', 'shots', 'possession', 'pass_success']
+
+
+def event_clock(frame):
+    """Seconds since kick-off from the ``minute``/``second`` columns."""
+    return frame['minute'].to_numpy(dtype=np.int64) * 60 + frame['second'].to_numpy(dtype=np.int64)
+
+
+def _binned(frame, team_col, teams, n_bins, bin_seconds, weights=None):
+    """(n_bins, n_teams) sums of ``weights`` (default 1 per row) per time bin and team."""
+    codes = {team: i for i, team in enumerate(teams)}
+    team_idx = frame[team_col].map(codes).to_numpy(dtype=np.float64)
+    bins = event_clock(frame) // bin_seconds
+    keep = ~np.isnan(team_idx) & (bins < n_bins)
+    flat = bins[keep] * len(teams) + team_idx[keep].astype(np.int64)
+    w = None if weights is None else np.asarray(weights, dtype=np.float64)[keep]
+    return np.bincount(flat, weights=w, minlength=n_bins * len(teams)).reshape(n_bins, len(teams))
+
+
+def _window(cumulative, window_bins):
+    """Sums over the last ``window_bins`` bins from cumulative sums along axis 0."""
+    shifted = np.zeros_like(cumulative)
+    if window_bins < len(cumulative):
+        shifted[window_bins:] = cumulative[:-window_bins]
+    return cumulative - shifted
+
+
+def build_timeline(events, shots, teams, bin_seconds=60, window_seconds=300, n_bins=None):
+    """Dense per-bin team metrics for a match.
+
+    ``shots`` must carry an ``xG`` column. ``possession`` is each team's share of
+    the events so far in possession of one of ``teams`` (50 before any); ``pass_success``
+    and ``xG_recent`` cover the last ``window_seconds``.
+    """
+    teams = list(teams)
+    if n_bins is None:
+        n_bins = int(event_clock(events).max() // bin_seconds) + 1 if len(events) else 1
+    window_bins = max(1, window_seconds // bin_seconds)
+
+    xg = _binned(shots, 'team', teams, n_bins, bin_seconds, shots['xG']).cumsum(axis=0)
+    shot_count = _binned(shots, 'team', teams, n_bins, bin_seconds).cumsum(axis=0)
+    possession = _binned(events, 'possession_team', teams, n_bins, bin_seconds).cumsum(axis=0)
+    possession_total = possession.sum(axis=1, keepdims=True)
+    passes = events[events['type'] == 'Pass']
+    pass_count = _binned(passes, 'team', teams, n_bins, bin_seconds).cumsum(axis=0)
+    completed = _binned(passes[passes['pass_outcome'].isna()], 'team', teams, n_bins, bin_seconds).cumsum(axis=0)
+
+    values = np.zeros((n_bins, len(teams), len(METRICS)))
+    values[..., METRICS.index('xG')] = xg
+    values[..., METRICS.index('xG_diff')] = 2 * xg - xg.sum(axis=1, keepdims=True)  # Own xG minus everyone else's
+    values[..., METRICS.index('xG_recent')] = _window(xg, window_bins)
+    values[..., METRICS.index('shots')] = shot_count
+    with np.errstate(invalid='ignore', divide='ignore'):
+        values[..., METRICS.index('possession')] = np.where(
+            possession_total > 0, 100 * possession / possession_total, 50.0)
+        recent_passes = _window(pass_count, window_bins)
+        values[..., METRICS.index('pass_success')] = np.where(
+            recent_passes > 0, 100 * _window(completed, window_bins) / recent_passes, 0.0)
+    return {'values': values, 'teams': teams, 'metrics': list(METRICS), 'bin_seconds': bin_seconds}
+
+
+def bin_index(timeline, minute, second=59):
+    """Bin holding ``minute:second``, clamped to the timeline (the default is the end of the minute)."""
+    index = (minute * 60 + second) // timeline['bin_seconds']
+    return int(min(max(index, 0), len(timeline['values']) - 1))
+
+
+def value(timeline, team, metric, minute, second=59):
+    """One metric for one team at a point in the match."""
+    return float(timeline['values'][bin_index(timeline, minute, second), timeline['teams'].index(team),
+                                    timeline['metrics'].index(metric)])
+
+
+def snapshot(timeline, team, minute, second=59):
+    """Every metric for one team at a point in the match, as a dict."""
+    row = timeline['values'][bin_index(timeline, minute, second), timeline['teams'].index(team)]
+    return dict(zip(timeline['metrics'], row.tolist()))
+
+
+def snapshots(timeline, team, minutes, second=59):
+    """Every metric for one team at each of ``minutes``, as a dict of arrays."""
+    index = (np.asarray(minutes) * 60 + second) // timeline['bin_seconds']
+    rows = timeline['values'][np.clip(index, 0, len(timeline['values']) - 1), timeline['teams'].index(team)]
+    return dict(zip(timeline['metrics'], rows.T))
+
+
+def series(timeline, team, metric):
+    """One metric for one team over the whole match, one value per bin."""
+    return timeline['values'][:, timeline['teams'].index(team), timeline['metrics'].index(metric)]
+
+
+# -------------------------
+# Rolling windows
+# -------------------------
+PERIOD_START_MINUTE = {1: 0, 2: 45, 3: 90, 4: 105, 5: 120}  # StatsBomb minutes restart at these per period
+DUEL_WON = ['Won', 'Success', 'Success In Play', 'Success Out']
+
+
+def match_clock(events):
+    """Monotonic seconds of play from period/minute/second.
+
+    Each period starts where the previous one ended, stoppage time included, so
+    second-half events never sort before first-half stoppage time.
+    """
+    period = events['period'].to_numpy(dtype=np.int64)
+    start = np.zeros(period.max() + 1 if len(period) else 1, dtype=np.int64)
+    for p, minute in PERIOD_START_MINUTE.items():
+        if p < len(start):
+            start[p] = minute * 60
+    elapsed = np.maximum(event_clock(events) - start[period], 0)
+    lengths = np.zeros(len(start), dtype=np.int64)
+    np.maximum.at(lengths, period, elapsed + 1)
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    return offsets[period] + elapsed
+
+
+def _base_counts(events, xg):
+    """Per-event contributions to each additive metric."""
+    event_type = events['type']
+    is_pass = event_type.eq('Pass').to_numpy()
+    is_shot = event_type.eq('Shot').to_numpy()
+    is_duel = event_type.eq('Duel').to_numpy()
+    return {
+        'passes': is_pass,
+        'completed_passes': is_pass & events['pass_outcome'].isna().to_numpy(),
+        'shots': is_shot,
+        'goals': is_shot & events['shot_outcome'].eq('Goal').to_numpy(),
+        'xG': np.nan_to_num(np.asarray(xg, dtype=np.float64)),
+        'pressures': event_type.eq('Pressure').to_numpy(),
+        'duels': is_duel,
+        'duels_won': is_duel & events['duel_outcome'].isin(DUEL_WON).to_numpy(),
+    }
+
+
+def build_rolling(events, xg=None, by='team', resolution_seconds=1):
+    """Prefix sums of every additive metric per ``by`` value (team or player) on the match clock.
+
+    ``xg`` is aligned with ``events`` (NaN/0 for non-shots); by default the
+    ``xG`` column is used if the frame has one. Any window is then two lookups.
+    """
+    import pandas as pd
+
+    if xg is None:
+        xg = events['xG'] if 'xG' in events.columns else np.zeros(len(events))
+    for col in ('pass_outcome', 'shot_outcome', 'duel_outcome'):
+        if col not in events.columns:
+            events = events.assign(**{col: np.nan})
+    owner = events[by]
+    keys = sorted(owner.dropna().unique().tolist())
+    codes = pd.Categorical(owner, categories=keys).codes.astype(np.int64)
+    clock = match_clock(events)
+    bins = clock // resolution_seconds
+    n_bins = int(bins.max()) + 1 if len(bins) else 1
+
+    keep = codes >= 0
+    flat = bins[keep] * len(keys) + codes[keep]
+    prefix = {}
+    for metric, weights in _base_counts(events, xg).items():
+        per_bin = np.bincount(flat, weights=np.asarray(weights, dtype=np.float64)[keep],
+                              minlength=n_bins * len(keys)).reshape(n_bins, len(keys))
+        prefix[metric] = np.zeros((n_bins + 1, len(keys)))
+        np.cumsum(per_bin, axis=0, out=prefix[metric][1:])  # prefix[i] = total over bins before i
+
+    # Nominal minute:second -> latest match clock reached by then, for "at minute m" queries
+    nominal = event_clock(events)
+    order = np.argsort(nominal, kind='stable')
+    return {
+        'by': by,
+        'keys': keys,
+        'prefix': prefix,
+        'resolution': resolution_seconds,
+        'nominal': nominal[order],
+        'clock_reached': np.maximum.accumulate(clock[order]) if len(order) else np.zeros(1, dtype=np.int64),
+    }
+
+
+def clock_at(rolling, minute, second=59):
+    """Match clock once every event stamped up to ``minute:second`` has happened (``minute`` may be an array)."""
+    i = np.searchsorted(rolling['nominal'], np.asarray(minute) * 60 + second, side='right') - 1
+    clock = np.where(i >= 0, rolling['clock_reached'][np.maximum(i, 0)], 0)
+    return int(clock) if clock.ndim == 0 else clock
+
+
+def _derived(totals, k, team_level):
+    """Add rates and, for teams, xG against to the window totals of key ``k``."""
+    own = {metric: values[..., k] for metric, values in totals.items()}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        own['pass_completion'] = np.where(own['passes'] > 0, 100 * own['completed_passes'] / own['passes'], 0.0)
+        own['duel_win_rate'] = np.where(own['duels'] > 0, 100 * own['duels_won'] / own['duels'], 0.0)
+    own['xG_for'] = own['xG']
+    if team_level:
+        own['xG_against'] = totals['xG'].sum(axis=-1) - own['xG']
+    return own
+
+
+def window_series(rolling, key, minutes, window_minutes=5, second=59):
+    """``window_stats`` at each of ``minutes``, as a dict of arrays."""
+    prefix, res = rolling['prefix'], rolling['resolution']
+    n_bins = len(next(iter(prefix.values()))) - 1
+    end = np.minimum(clock_at(rolling, np.asarray(minutes), second) // res + 1, n_bins)
+    start = np.maximum(end - int(window_minutes * 60) // res, 0)
+    totals = {metric: values[end] - values[start] for metric, values in prefix.items()}
+    return _derived(totals, rolling['keys'].index(key), rolling['by'] == 'team')
+
+
+def window_stats(rolling, key, minute, window_minutes=5, second=59):
+    """Every metric for one team/player over the ``window_minutes`` of play up to ``minute:second``."""
+    stats = window_series(rolling, key, [minute], window_minutes, second)
+    return {metric: float(v[0]) for metric, v in stats.items()}
+
+
+def rolling_series(rolling, key, metric, window_minutes=5, step_minutes=1):
+    """(window end in match-clock minutes, metric) for windows of ``window_minutes`` every ``step_minutes``."""
+    prefix, res = rolling['prefix'], rolling['resolution']
+    n_bins = len(next(iter(prefix.values()))) - 1
+    step = max(int(step_minutes * 60) // res, 1)
+    ends = np.arange(step, n_bins + step, step).clip(max=n_bins)
+    starts = np.maximum(ends - int(window_minutes * 60) // res, 0)
+    totals = {name: values[ends] - values[starts] for name, values in prefix.items()}
+    stats = _derived(totals, rolling['keys'].index(key), rolling['by'] == 'team')
+    return ends * res / 60, stats[metric]
@@ -0,0 +1,90 @@
+"""Two-tier memo cache for Dash callback results.
+
+A result (the ``children`` a callback returns) is keyed by a hash of everything
+that determines it: match, data version, player, tab, render parameters. Recent
+results stay in an in-process LRU, so a repeat view costs a dict lookup; every
+result is also written as JSON to a shared ``RenderCache`` directory, so gunicorn
+workers and restarts reuse each other's renders. Keys carry the match data
+version, so rewritten match data never hits a stale entry, and ``invalidate``
+empties the in-process tier when the caller reloads its data.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+from render_cache import RenderCache, render_key
+
+
+def to_json(result):
+    """Serialise callback output (Dash components, dicts, strings...) the way Dash sends it."""
+    from plotly.utils import PlotlyJSONEncoder
+
+    return json.dumps(result, cls=PlotlyJSONEncoder)
+
+
+class ViewCache:
+    """In-process LRU of callback results in front of a shared on-disk ``RenderCache``."""
+
+    def __init__(self, directory, max_entries=128, max_bytes=200 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.disk = RenderCache(directory, max_bytes=max_bytes, extension='view')
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()  # key -> result (decoded JSON), least recently used first
+        self._lock = threading.Lock()
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get_or_compute(self, params, compute):
+        """The result for ``params``: from memory, else from disk, else ``compute()`` (stored in both)."""
+        key = render_key(params)
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+        computed = []
+
+        def render(path):
+            encoded = to_json(compute())
+            with open(path, 'w') as f:
+                f.write(encoded)
+            computed.append(json.loads(encoded))
+            return {}
+
+        key, _ = self.disk.get_or_render(params, render)
+        if computed:
+            result = computed[0]
+        else:
+            try:
+                with open(self.disk.path(key)) as f:
+                    result = json.load(f)
+            except (OSError, ValueError):  # Evicted by another worker in between
+                result = json.loads(to_json(compute()))
+        self._remember(key, result)
+        return result
+
+    def forget(self, params):
+        """Drop the result for ``params`` from both tiers."""
+        key = render_key(params)
+        with self._lock:
+            self._memory.pop(key, None)
+        self.disk.remove(key)
+
+    def invalidate(self):
+        """Forget the in-process tier (disk entries are keyed by data version and age out by LRU)."""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self):
+        with self._lock:
+            memory = {'entries': len(self._memory), 'max_entries': self.max_entries,
+                      'hits': self.hits, 'misses': self.misses}
+        return {'memory': memory, 'disk': self.disk.stats()}
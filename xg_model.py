@@ -0,0 +1,391 @@
+"""Shared xG model used by the live, post-match and assistant apps.
+
+The model is an SGD logistic regression trained incrementally: each newly stored
+match is folded in with ``partial_fit`` over its own shots, and the training state
+is checkpointed so later updates continue from it. While the corpus is small
+(``BATCH_FIT_SHOTS``) the training shots are kept too and a batch logistic
+regression is fitted alongside: if the SGD model scores a worse held-out Brier
+score, the batch fit is published instead and the SGD continues from its
+coefficients. Every update saves a small
+versioned artifact (coefficients, intercept and per-feature fill values) under
+``<store>/models/xg``; the apps load it in milliseconds and score shots with a
+batch ``predict``. Each match's shot features and xG are cached next to its
+events and recomputed only when the model version changes. One shot in five is
+held out of training for the calibration report.
+
+Usage:
+    python xg_model.py update             # Train on stored matches the model has not seen
+    python xg_model.py train              # Start over on every stored match
+    python xg_model.py report             # Held-out calibration of the current model
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import threading
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import match_store
+
+FEATURE_VERSION = 1  # Bump when shot_features changes; part of every model version
+FEATURES = [
+    'distance', 'angle', 'is_header', 'is_open_play', 'under_pressure', 'gk_distance',
+    'defender_density', 'is_volley', 'is_big_chance', 'cone_blockers', 'nearest_defender',
+]
+MODEL_DIR = os.path.join(match_store.STORE_DIR, 'models', 'xg')
+CURRENT_FILE = os.path.join(MODEL_DIR, 'CURRENT')
+CHECKPOINT_FILE = os.path.join(MODEL_DIR, 'checkpoint.pkl')  # SGD state, feature means and held-out shots
+
+EPOCHS = 5  # partial_fit passes over each new match's shots
+BATCH_FIT_SHOTS = 20000  # Training shots kept for the batch reference fit; beyond this the SGD runs alone
+HOLDOUT_SHARE = 5  # One shot in five (by id hash) is held out for the calibration report
+# Fixed feature scales for SGD, so coefficients learned on earlier matches stay comparable as the corpus grows
+FEATURE_SCALE = {'distance': 40.0, 'angle': 45.0, 'gk_distance': 20.0, 'defender_density': 2.0,
+                 'cone_blockers': 2.0, 'nearest_defender': 5.0}
+
+_model = None
+_model_lock = threading.Lock()
+
+
+# -------------------------
+# Features
+# -------------------------
+def _column(df, name):
+    """A column of ``df``, or all-missing if the frame does not have it (e.g. a live event)."""
+    return df[name] if name in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+
+
+def shot_features(events):
+    """The shots of an events frame with the model features and the ``goal`` label added."""
+    from freeze_frames import freeze_frame_features
+
+    shots = events[events['type'] == 'Shot'].copy()
+    shots['distance'] = np.sqrt((120 - shots['x']) ** 2 + (40 - shots['y']) ** 2)
+    shots['angle'] = np.arctan2(40 - shots['y'], 120 - shots['x']).abs() * 180 / np.pi
+    shots['goal'] = _column(shots, 'shot_outcome').eq('Goal').astype(int)
+    shots['is_header'] = _column(shots, 'shot_body_part').eq('Head').astype(int)
+    shots['is_open_play'] = _column(shots, 'shot_type').eq('Open Play').astype(int)
+    shots['under_pressure'] = _column(shots, 'under_pressure').eq(True).astype(int)
+    shots['is_volley'] = _column(shots, 'shot_technique').eq('Volley').astype(int)
+    shots['is_big_chance'] = _column(shots, 'shot_key_pass_id').notna().astype(int)
+
+    # Freeze-frame features, computed over all shots at once; missing values are filled at predict time
+    shots['shot_freeze_frame'] = _column(shots, 'shot_freeze_frame')
+    frame_features = freeze_frame_features(shots)
+    for col in frame_features.columns:
+        shots[col] = frame_features[col]
+    return shots
+
+
+# -------------------------
+# Model artifact
+# -------------------------
+def _version(artifact):
+    digest = hashlib.sha1()
+    digest.update(json.dumps(artifact['features']).encode())
+    for key in ('coef', 'intercept', 'fill'):
+        digest.update(np.asarray(artifact[key], dtype=np.float64).tobytes())
+    return f"{FEATURE_VERSION}.{digest.hexdigest()[:12]}"
+
+
+def save_artifact(artifact):
+    """Write the artifact as <version>.npz and make it the current model."""
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    path = os.path.join(MODEL_DIR, f"{artifact['version']}.npz")
+    with open(f"{path}.tmp", 'wb') as f:
+        np.savez(f, features=np.array(artifact['features']), coef=artifact['coef'],
+                 intercept=artifact['intercept'], fill=artifact['fill'],
+                 meta=json.dumps({**artifact['meta'], 'version': artifact['version']}))
+    os.replace(f"{path}.tmp", path)
+    with open(f"{CURRENT_FILE}.tmp", 'w') as f:
+        f.write(artifact['version'])
+    os.replace(f"{CURRENT_FILE}.tmp", CURRENT_FILE)
+    return path
+
+
+def load_artifact(version=None):
+    """Load a saved model (default: the current one); None if there is none yet."""
+    if version is None:
+        if not os.path.exists(CURRENT_FILE):
+            return None
+        with open(CURRENT_FILE) as f:
+            version = f.read().strip()
+    path = os.path.join(MODEL_DIR, f"{version}.npz")
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        meta = json.loads(str(data['meta']))
+        return {
+            'version': meta.pop('version'),
+            'features': [str(f) for f in data['features']],
+            'coef': data['coef'],
+            'intercept': float(data['intercept']),
+            'fill': data['fill'],
+            'meta': meta,
+        }
+
+
+def get_model():
+    """The current model, loaded once per process and trained on first use if none is saved."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = load_artifact()
+            if _model is None or _model['features'] != FEATURES or not _model['version'].startswith(f"{FEATURE_VERSION}."):
+                _model = train()
+    return _model
+
+
+def model_version():
+    return get_model()['version']
+
+
+# -------------------------
+# Incremental training
+# -------------------------
+def _feature_scale():
+    return np.array([FEATURE_SCALE.get(name, 1.0) for name in FEATURES])
+
+
+def _is_holdout(shot_ids):
+    """Stable held-out split by shot id, so a shot never moves between training and calibration."""
+    return np.array([zlib.crc32(str(i).encode()) % HOLDOUT_SHARE == 0 for i in shot_ids], dtype=bool)
+
+
+def _new_checkpoint():
+    from sklearn.linear_model import SGDClassifier
+
+    return {
+        # Decaying step size: large enough to converge on a few matches, settling as the corpus grows
+        'sgd': SGDClassifier(loss='log_loss', alpha=1e-4, learning_rate='optimal', random_state=42),
+        'matches': [],
+        'shots': 0,
+        'feature_sum': np.zeros(len(FEATURES)),
+        'feature_count': np.zeros(len(FEATURES)),
+        'holdout_X': np.empty((0, len(FEATURES))),
+        'holdout_y': np.empty(0, dtype=int),
+        'train_X': np.empty((0, len(FEATURES))),  # Scaled training shots for the batch fit; None once dropped
+        'train_y': np.empty(0, dtype=int),
+    }
+
+
+def load_checkpoint():
+    """The training state saved by the last update, or None."""
+    if not os.path.exists(CHECKPOINT_FILE):
+        return None
+    with open(CHECKPOINT_FILE, 'rb') as f:
+        checkpoint = pickle.load(f)
+    return checkpoint if checkpoint.get('features') == FEATURES and 'train_X' in checkpoint else None
+
+
+def save_checkpoint(checkpoint):
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    with open(f"{CHECKPOINT_FILE}.tmp", 'wb') as f:
+        pickle.dump({**checkpoint, 'features': list(FEATURES)}, f)
+    os.replace(f"{CHECKPOINT_FILE}.tmp", CHECKPOINT_FILE)
+
+
+def _fill(checkpoint):
+    """Per-feature mean over every shot seen so far; 0 for features never present."""
+    return checkpoint['feature_sum'] / np.maximum(checkpoint['feature_count'], 1)
+
+
+def _batch_fit(checkpoint):
+    """(coef, intercept) of a batch logistic regression on the kept training shots (scaled features).
+
+    None once the shots are dropped, or while they hold a single class.
+    """
+    from sklearn.linear_model import LogisticRegression
+
+    X, y = checkpoint['train_X'], checkpoint['train_y']
+    if X is None or len(np.unique(y)) < 2:
+        return None
+    fit = LogisticRegression(max_iter=1000).fit(X, y)
+    return fit.coef_[0], float(fit.intercept_[0])
+
+
+def _artifact(checkpoint, coef=None, intercept=None):
+    """Model artifact (raw-feature coefficients) from the training state, or from given scaled coefficients."""
+    sgd = checkpoint['sgd']
+    if coef is None:
+        if not hasattr(sgd, 'coef_'):
+            raise ValueError("xG model has no training shots yet")
+        coef, intercept = sgd.coef_[0], sgd.intercept_[0]
+    artifact = {
+        'features': list(FEATURES),
+        'coef': coef / _feature_scale(),  # Fold the fixed scaling into the coefficients
+        'intercept': float(intercept),
+        'fill': _fill(checkpoint),
+        'meta': {'matches': len(checkpoint['matches']), 'shots': checkpoint['shots']},
+    }
+    report = calibration_report(artifact, checkpoint['holdout_X'], checkpoint['holdout_y'])
+    artifact['meta'].update({key: report[key] for key in ('holdout', 'brier', 'log_loss', 'ece')})
+    artifact['version'] = _version(artifact)
+    return artifact
+
+
+def update(match_ids=None, reset=False, save=True):
+    """Train on the shots of matches the model has not seen yet (default: every stored match).
+
+    Each new match costs one pass of partial_fit over its own shots, so keeping the
+    model current as the store grows never means retraining on the whole corpus.
+    """
+    global _model
+    checkpoint = (None if reset else load_checkpoint()) or _new_checkpoint()
+    seen = set(checkpoint['matches'])
+    candidates = match_ids or match_store.stored_match_ids() or [match_store.WORLD_CUP_FINAL]
+    new_matches = [int(m) for m in candidates if int(m) not in seen]
+
+    scale = _feature_scale()
+    rng = np.random.default_rng(len(checkpoint['matches']))
+    for match_id in new_matches:
+        shots = shot_features(match_store.load_events(match_id))
+        X = shots[FEATURES].to_numpy(dtype=np.float64)
+        y = shots['goal'].to_numpy()
+        present = ~np.isnan(X)
+        checkpoint['feature_sum'] += np.where(present, X, 0).sum(axis=0)
+        checkpoint['feature_count'] += present.sum(axis=0)
+
+        holdout = _is_holdout(shots['id'])
+        checkpoint['holdout_X'] = np.vstack([checkpoint['holdout_X'], X[holdout]])
+        checkpoint['holdout_y'] = np.concatenate([checkpoint['holdout_y'], y[holdout]])
+        X_train = np.where(present, X, _fill(checkpoint))[~holdout] / scale
+        y_train = y[~holdout]
+        if checkpoint['train_X'] is not None:
+            checkpoint['train_X'] = np.vstack([checkpoint['train_X'], X_train])
+            checkpoint['train_y'] = np.concatenate([checkpoint['train_y'], y_train])
+        for _ in range(EPOCHS):
+            order = rng.permutation(len(y_train))
+            checkpoint['sgd'].partial_fit(X_train[order], y_train[order], classes=[0, 1])
+        checkpoint['matches'].append(match_id)
+        checkpoint['shots'] += len(shots)
+
+    artifact = _artifact(checkpoint)
+    batch = _batch_fit(checkpoint) if new_matches else None
+    if batch is not None:
+        reference = _artifact(checkpoint, *batch)
+        if not artifact['meta']['brier'] <= reference['meta']['brier']:  # NaN (no held-out shots) too
+            sgd = checkpoint['sgd']
+            sgd.coef_[0], sgd.intercept_[0] = batch  # Later partial_fit passes continue from the batch fit
+            artifact = reference
+            print("xG model: SGD held-out Brier worse than the batch fit; publishing the batch fit")
+    if checkpoint['train_X'] is not None and len(checkpoint['train_y']) > BATCH_FIT_SHOTS:
+        checkpoint['train_X'] = checkpoint['train_y'] = None
+    print(f"xG model {artifact['version']}: +{len(new_matches)} matches, "
+          f"{checkpoint['shots']} shots from {len(checkpoint['matches'])} matches, "
+          f"held-out Brier {artifact['meta']['brier']:.3f}")
+    if save:
+        save_checkpoint(checkpoint)
+        save_artifact(artifact)
+        _model = artifact
+    return artifact
+
+
+def train(match_ids=None, save=True):
+    """Train a fresh model on ``match_ids`` (default: every stored match), discarding the checkpoint."""
+    return update(match_ids, reset=True, save=save)
+
+
+def calibration_report(artifact, X, y, bins=10):
+    """Reliability table and scores of ``artifact`` on held-out shots."""
+    y = np.asarray(y, dtype=np.float64)
+    p = predict(X, artifact) if len(y) else np.empty(0)
+    edges = np.linspace(0, 1, bins + 1)
+    which = np.clip(np.digitize(p, edges) - 1, 0, bins - 1)
+    rows = []
+    for b in range(bins):
+        in_bin = which == b
+        if in_bin.any():
+            rows.append((edges[b], edges[b + 1], int(in_bin.sum()), float(p[in_bin].mean()), float(y[in_bin].mean())))
+    clipped = np.clip(p, 1e-9, 1 - 1e-9)
+    return {
+        'holdout': int(len(y)),
+        'goals': int(y.sum()),
+        'xg': float(p.sum()),
+        'brier': float(np.mean((p - y) ** 2)) if len(y) else float('nan'),
+        'log_loss': float(-np.mean(y * np.log(clipped) + (1 - y) * np.log(1 - clipped))) if len(y) else float('nan'),
+        'ece': float(sum(n * abs(pred - obs) for _, _, n, pred, obs in rows) / len(y)) if len(y) else float('nan'),
+        'bins': rows,
+    }
+
+
+def print_calibration(report):
+    print(f"Held-out calibration ({report['holdout']} shots, {report['goals']} goals, {report['xg']:.2f} xG):")
+    print(f"  {'xG bin':<14}{'shots':>7}{'mean xG':>10}{'goal rate':>11}")
+    for low, high, n, pred, obs in report['bins']:
+        print(f"  {low:.1f} - {high:.1f}     {n:>7}{pred:>10.3f}{obs:>11.3f}")
+    print(f"  Brier {report['brier']:.4f}   log loss {report['log_loss']:.4f}   ECE {report['ece']:.4f}")
+
+
+# -------------------------
+# Prediction
+# -------------------------
+def predict(X, model=None):
+    """Goal probability for each row of ``X`` (a frame with the FEATURES columns, or an array in that order)."""
+    model = model or get_model()
+    if isinstance(X, pd.DataFrame):
+        X = X[model['features']].to_numpy(dtype=np.float64)
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    X = np.where(np.isnan(X), model['fill'], X)
+    return 1 / (1 + np.exp(-(X @ model['coef'] + model['intercept'])))
+
+
+def event_xg(event, model=None):
+    """xG of one shot event dict (e.g. from the live feed); fields it lacks are filled like missing data."""
+    return float(predict(shot_features(pd.DataFrame([event])), model)[0])
+
+
+def load_shots(match_id=match_store.WORLD_CUP_FINAL, categorical=False):
+    """A match's shots with features and ``xG``, cached in the store per model version."""
+    model = get_model()
+    events = match_store.load_events(match_id, categorical=categorical)
+    path = os.path.join(match_store.match_dir(match_id), 'shot_xg.parquet')
+    if os.path.exists(path) and match_store.read_table_meta(path).get('model_version') == model['version']:
+        cached = match_store.read_table(path).set_index('id')
+        shots = events[events['type'] == 'Shot']
+        shots = shots.drop(columns=[col for col in cached.columns if col in shots.columns])
+        return shots.join(cached, on='id')
+
+    shots = shot_features(events)
+    shots['xG'] = predict(shots, model)
+    match_store.write_table(path, shots[['id'] + FEATURES + ['goal', 'xG']].reset_index(drop=True),
+                            {'match_id': int(match_id), 'model_version': model['version']})
+    return shots
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and inspect the shared xG model.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in [('update', "Train on stored matches the model has not seen yet"),
+                            ('train', "Discard the checkpoint and train on stored matches from scratch")]:
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument('--match-id', type=int, nargs='+', default=None, help="Default: every stored match")
+    sub.add_parser('report', help="Held-out calibration report of the current model")
+    sub.add_parser('info', help="Show the current model")
+    args = parser.parse_args(argv)
+
+    if args.command in ('update', 'train'):
+        artifact = (update if args.command == 'update' else train)(args.match_id)
+        print(f"Saved xG model {artifact['version']} -> {MODEL_DIR}")
+    elif args.command == 'report':
+        checkpoint = load_checkpoint()
+        if checkpoint is None:
+            print("No xG model trained yet")
+            return
+        print_calibration(calibration_report(_artifact(checkpoint), checkpoint['holdout_X'], checkpoint['holdout_y']))
+    elif args.command == 'info':
+        artifact = load_artifact()
+        if artifact is None:
+            print("No xG model trained yet")
+            return
+        print(f"xG model {artifact['version']}: {artifact['meta']}")
+        for name, coef in zip(artifact['features'], artifact['coef']):
+            print(f"  {name:<20}{coef:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()